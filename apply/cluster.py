@@ -1,13 +1,24 @@
+from typing import List
+
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 from models.layer_model.model import NewSynset
+from models.similarity import normalize_rows
+
+
+def unit_vector(vector: np.ndarray) -> np.ndarray:
+    """
+    :return: вектор единичной длины (нулевой вектор остается нулевым)
+    """
+    return normalize_rows(np.asarray(vector, dtype=np.float64)[None, :])[0]
 
 
 class Cluster:
     """
     хранит множество синсетов, похожих по смыслу
     в момент применения ко всем данным ярна  нужен для быстрого слияния (и проверки того, можно ли слить)
+    Вместо векторов синсетов хранится сумма их нормированных векторов: средняя косинусная мера синсета
+    с синсетами кластера равна скалярному произведению его нормированного вектора на центроид (сумма / размер)
     """
 
     def __init__(self, initial_synset: NewSynset, initial_synset_vector: np.ndarray):
@@ -17,7 +28,20 @@ class Cluster:
         :param threshold
         """
         self.__synsets = [initial_synset]
-        self.__vectors = [initial_synset_vector]
+        self.__vectors_sum = unit_vector(initial_synset_vector)
+
+    @staticmethod
+    def restore(synsets: List[NewSynset], centroid: np.ndarray) -> 'Cluster':
+        """
+        восстанавливает кластер из снимка
+        :param synsets: синсеты кластера
+        :param centroid: центроид кластера
+        :return: кластер
+        """
+        cluster = Cluster.__new__(Cluster)
+        cluster.__synsets = list(synsets)
+        cluster.__vectors_sum = np.array(centroid, dtype=np.float64) * len(synsets)
+        return cluster
 
     def similarity_to(self, synset: NewSynset, synset_vector: np.ndarray) -> float:
         """
@@ -26,7 +50,16 @@ class Cluster:
         :param synset_vector: вектор синсета
         :return: косинусную близость
         """
-        return np.mean(cosine_similarity([synset_vector], self.__vectors)[0])
+        return float(np.dot(unit_vector(synset_vector), self.centroid()))
+
+    def centroid(self) -> np.ndarray:
+        """
+        :return: среднее нормированных векторов синсетов кластера
+        """
+        return self.__vectors_sum / len(self.__synsets)
+
+    def synsets(self):
+        return self.__synsets
 
     def add(self, synset: NewSynset, synset_vector: np.ndarray):
         """
@@ -36,7 +69,7 @@ class Cluster:
         :return: None
         """
         self.__synsets.append(synset)
-        self.__vectors.append(synset_vector)
+        self.__vectors_sum = self.__vectors_sum + unit_vector(synset_vector)
 
     def size(self):
         """
@@ -0,0 +1,237 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import deque, namedtuple
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import tqdm
+
+from apply.structures import DefDict
+from models.layer_model.additional import Word2VecOrdering
+from models.layer_model.model import LayerModel
+
+CHECKPOINT_FILE = 'checkpoint.json'
+MERGED_FILE = 'new_synsets.csv'
+# сколько частей на процесс ParallelBatchRunner читает заранее
+TASKS_PER_WORKER = 2
+# столбцы файлов результата
+RESULT_COLUMNS = ['yarn_id', 'words', 'def_ids']
+
+ShardResult = namedtuple('ShardResult', 'shard rows last_yarn_id definitions')
+
+# состояние процесса-обработчика: модель достается от родительского процесса при fork, словарь определений
+# (со своим подключением к базе) создается в каждом процессе
+_worker_state = {}
+
+
+def write_atomically(path: str, write):
+    """
+    записывает файл через временный файл и os.replace, чтобы при падении на диске не оставался
+    наполовину записанный файл
+    :param path: путь до файла
+    :param write: функция, которая принимает открытый на запись файл
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def process_chunk(model: LayerModel, definitions: DefDict, frame: pd.DataFrame) -> Tuple[Dict[str, List], int]:
+    """
+    выделяет новые синсеты для всех синсетов из frame
+    :param model: модель
+    :param definitions: словарь определений
+    :param frame: часть yarn-synsets.csv
+    :return: новые синсеты в виде столбцов yarn_id, words, def_ids и количество обработанных определений
+    """
+    processed = {column: [] for column in RESULT_COLUMNS}
+    definitions_count = 0
+    ordered_synsets = Word2VecOrdering.order_words_sequences_using_average_sim(
+        [words.split(';') for words in frame.words])
+    for yarn_id, ordered_words in zip(frame.id, ordered_synsets):
+        model_input = definitions.get_synset_definitions(ordered_words)
+        definitions_count += sum(len(d) for d in model_input.values() if d)
+        for new_synset in model.extract_new_synsets(model_input):
+            processed['yarn_id'].append(yarn_id)
+            processed['words'].append(';'.join(new_synset.words))
+            if new_synset.definitions:
+                processed['def_ids'].append(';'.join(str(d.id) for d in new_synset.definitions))
+            else:
+                processed['def_ids'].append('')
+    return processed, definitions_count
+
+
+def process_shard(model: LayerModel, definitions: DefDict, output_dir: str, shard: str,
+                  frame: pd.DataFrame) -> ShardResult:
+    """
+    обрабатывает часть синсетов и сохраняет результат в отдельный файл shard
+    """
+    processed, definitions_count = process_chunk(model, definitions, frame)
+    write_atomically(os.path.join(output_dir, shard), lambda f: pd.DataFrame(processed).to_csv(f))
+    return ShardResult(shard, frame.shape[0], int(frame.id.iloc[-1]), definitions_count)
+
+
+def _init_worker(definitions_factory: Callable[[], DefDict]):
+    _worker_state['definitions'] = definitions_factory()
+
+
+def _process_shard_in_worker(task: Tuple[str, str, pd.DataFrame]) -> ShardResult:
+    output_dir, shard, frame = task
+    return process_shard(_worker_state['model'], _worker_state['definitions'], output_dir, shard, frame)
+
+
+class BatchRunner:
+    """
+    Применяет модель ко всем синсетам ярна. Файл синсетов читается один раз потоково, после каждой части
+    результат сохраняется в отдельный файл, а в checkpoint.json записывается, до какого синсета дошла обработка.
+    При повторном запуске обработка продолжается с места остановки
+    """
+
+    def __init__(self, model: LayerModel, definitions: Optional[DefDict] = None, output_dir: str = 'new_synsets',
+                 chunk_size: int = 1000):
+        """
+        :param model: модель
+        :param definitions: словарь определений, по умолчанию создается при запуске
+        :param output_dir: каталог для результатов и checkpoint.json
+        :param chunk_size: сколько синсетов обрабатывается между сохранениями
+        """
+        self._model = model
+        self._definitions = definitions
+        self._output_dir = output_dir
+        self._chunk_size = chunk_size
+
+    def checkpoint_path(self) -> str:
+        return os.path.join(self._output_dir, CHECKPOINT_FILE)
+
+    def load_checkpoint(self) -> Dict:
+        """
+        :return: сохраненное состояние обработки: сколько строк прочитано, последний yarn_id, файлы результатов
+        и метрики
+        """
+        if not os.path.exists(self.checkpoint_path()):
+            return {'rows': 0, 'last_yarn_id': None, 'shards': [], 'synsets': 0, 'definitions': 0, 'seconds': 0.0}
+        with open(self.checkpoint_path(), encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_checkpoint(self, checkpoint: Dict):
+        write_atomically(self.checkpoint_path(), lambda f: json.dump(checkpoint, f, ensure_ascii=False, indent=2))
+
+    def shard_name(self, first_row: int, last_row: int) -> str:
+        return 'new_synsets_{}_{}.csv'.format(first_row, last_row)
+
+    def run(self, synsets_path: str = 'yarn-synsets.csv') -> Dict:
+        """
+        :param synsets_path: csv с синсетами ярна (столбцы id, words, ...)
+        :return: итоговое состояние обработки с метриками
+        """
+        os.makedirs(self._output_dir, exist_ok=True)
+        checkpoint = self.load_checkpoint()
+        if checkpoint['rows']:
+            print('Продолжение обработки после синсета {} (прочитано строк: {})'.format(checkpoint['last_yarn_id'],
+                                                                                      checkpoint['rows']))
+        start = time.perf_counter()
+        for result in tqdm.tqdm(self.process_shards(self.read_shards(synsets_path, checkpoint['rows']))):
+            elapsed, start = time.perf_counter() - start, time.perf_counter()
+            checkpoint['rows'] += result.rows
+            checkpoint['last_yarn_id'] = result.last_yarn_id
+            checkpoint['shards'].append(result.shard)
+            checkpoint['synsets'] += result.rows
+            checkpoint['definitions'] += result.definitions
+            checkpoint['seconds'] += elapsed
+            self.save_checkpoint(checkpoint)
+            print('Сохранен результат {}: {:.1f} синсетов/c, {:.1f} определений/c'.format(
+                result.shard, result.rows / elapsed, result.definitions / elapsed))
+        self.merge_shards(checkpoint['shards'])
+        self.print_metrics(checkpoint)
+        return checkpoint
+
+    def read_shards(self, synsets_path: str, skip_rows: int) -> Iterator[Tuple[str, str, pd.DataFrame]]:
+        """
+        потоково читает файл синсетов, пропуская уже обработанные строки
+        :return: задания вида (каталог результатов, имя файла части, часть синсетов)
+        """
+        first_row = skip_rows
+        try:
+            frames = pd.read_csv(synsets_path, skiprows=range(1, skip_rows + 1), chunksize=self._chunk_size)
+        except pd.errors.EmptyDataError:
+            return
+        for frame in frames:
+            if frame.empty:
+                continue
+            yield self._output_dir, self.shard_name(first_row, first_row + frame.shape[0]), frame
+            first_row += frame.shape[0]
+
+    def process_shards(self, tasks: Iterable[Tuple[str, str, pd.DataFrame]]) -> Iterator[ShardResult]:
+        """
+        :return: результаты обработки частей в том же порядке, в котором они были прочитаны
+        """
+        if self._definitions is None:
+            self._definitions = DefDict()
+        for output_dir, shard, frame in tasks:
+            yield process_shard(self._model, self._definitions, output_dir, shard, frame)
+
+    def merge_shards(self, shards: List[str]) -> str:
+        """
+        объединяет части результата в один файл, упорядоченный по yarn_id
+        :return: путь до объединенного файла
+        """
+        if shards:
+            merged = pd.concat([pd.read_csv(os.path.join(self._output_dir, shard), index_col=0,
+                                            keep_default_na=False) for shard in shards], ignore_index=True)
+            merged = merged.sort_values('yarn_id', kind='mergesort').reset_index(drop=True)
+        else:
+            # пустой файл синсетов - результат из одних заголовков
+            merged = pd.DataFrame(columns=RESULT_COLUMNS)
+        path = os.path.join(self._output_dir, MERGED_FILE)
+        write_atomically(path, lambda f: merged.to_csv(f))
+        return path
+
+    @staticmethod
+    def print_metrics(checkpoint: Dict):
+        seconds = checkpoint['seconds'] or float('nan')
+        print('Обработано синсетов: {}, определений: {}, за {:.1f} c'.format(checkpoint['synsets'],
+                                                                            checkpoint['definitions'],
+                                                                            checkpoint['seconds']))
+        print('В среднем {:.1f} синсетов/c, {:.1f} определений/c'.format(checkpoint['synsets'] / seconds,
+                                                                         checkpoint['definitions'] / seconds))
+
+
+class ParallelBatchRunner(BatchRunner):
+    """
+    То же, что BatchRunner, но части синсетов обрабатываются в нескольких процессах. Процессы создаются через fork
+    после загрузки модели, поэтому модель (и векторы, отображенные в память) не копируется в каждый процесс.
+    Каждый процесс сам записывает свои части результата, итоговый файл совпадает с результатом BatchRunner
+    """
+
+    def __init__(self, model: LayerModel, definitions_factory: Callable[[], DefDict] = DefDict, workers: int = None,
+                 output_dir: str = 'new_synsets', chunk_size: int = 1000):
+        """
+        :param model: модель, загруженная в родительском процессе
+        :param definitions_factory: создает словарь определений в каждом процессе
+        :param workers: количество процессов, по умолчанию - количество ядер
+        """
+        super().__init__(model, output_dir=output_dir, chunk_size=chunk_size)
+        self._definitions_factory = definitions_factory
+        self._workers = workers or os.cpu_count()
+
+    def process_shards(self, tasks: Iterable[Tuple[str, str, pd.DataFrame]]) -> Iterator[ShardResult]:
+        _worker_state['model'] = self._model
+        context = multiprocessing.get_context('fork')
+        tasks = iter(tasks)
+        with context.Pool(self._workers, initializer=_init_worker, initargs=(self._definitions_factory,)) as pool:
+            # в очереди пула не больше workers * TASKS_PER_WORKER частей, поэтому файл синсетов не читается
+            # целиком заранее. Результаты возвращаются в порядке заданий, поэтому checkpoint всегда указывает
+            # на непрерывно обработанное начало файла
+            pending = deque(pool.apply_async(_process_shard_in_worker, (task,))
+                            for task in islice(tasks, self._workers * TASKS_PER_WORKER))
+            while pending:
+                result = pending.popleft().get()
+                for task in islice(tasks, 1):
+                    pending.append(pool.apply_async(_process_shard_in_worker, (task,)))
+                yield result
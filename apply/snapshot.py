@@ -0,0 +1,165 @@
+import json
+import os
+import shutil
+from typing import Iterable, List
+
+import numpy as np
+
+from models.layer_model.base import Definition
+from models.layer_model.model import NewSynset
+
+META_FILE = 'meta.json'
+# все массивы снимка, каждый хранится в отдельном .npy, чтобы его можно было отобразить в память
+ARRAYS = ('strings', 'string_offsets',
+          'synset_words', 'synset_word_offsets', 'synset_definitions', 'synset_definition_offsets',
+          'definition_ids', 'definition_words', 'definition_texts',
+          'cluster_offsets', 'centroids')
+
+
+class _StringTable:
+    """
+    Собирает все строки снимка (слова и тексты определений) в один массив байтов utf-8
+    """
+
+    def __init__(self):
+        self.__index = {}
+        self.__encoded = []
+
+    def add(self, string: str) -> int:
+        """
+        :return: номер строки в таблице
+        """
+        if string not in self.__index:
+            self.__index[string] = len(self.__encoded)
+            self.__encoded.append(string.encode('utf-8'))
+        return self.__index[string]
+
+    def arrays(self):
+        offsets = np.zeros(len(self.__encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(s) for s in self.__encoded])
+        return np.frombuffer(b''.join(self.__encoded), dtype=np.uint8), offsets
+
+
+def write_snapshot(path: str, clusters: List[List[NewSynset]], centroids: np.ndarray,
+                   problem_synsets: Iterable[List[str]], threshold: float, processed_synsets: int = 0):
+    """
+    сохраняет состояние кластеризации в каталог path. Сначала все пишется во временный каталог, который затем
+    подменяет старый снимок, поэтому при падении на диске остается предыдущий целый снимок
+    :param clusters: синсеты каждого кластера
+    :param centroids: матрица центроидов кластеров (строка на кластер)
+    :param problem_synsets: синсеты (списки слов), для которых не удалось извлечь вектор
+    :param threshold: порог схожести, с которым строились кластеры
+    :param processed_synsets: сколько синсетов уже обработано, чтобы продолжить с этого места
+    """
+    strings = _StringTable()
+    synset_words, synset_word_offsets = [], [0]
+    synset_definitions, synset_definition_offsets = [], [0]
+    definition_ids, definition_words, definition_texts = [], [], []
+    cluster_offsets = [0]
+
+    def add_synset(words, definitions):
+        synset_words.extend(strings.add(w) for w in words)
+        synset_word_offsets.append(len(synset_words))
+        for d in definitions:
+            synset_definitions.append(len(definition_ids))
+            definition_ids.append(d.id)
+            definition_words.append(strings.add(d.word))
+            definition_texts.append(strings.add(d.definition))
+        synset_definition_offsets.append(len(synset_definitions))
+
+    for cluster in clusters:
+        for synset in cluster:
+            add_synset(synset.words, synset.definitions or [])
+        cluster_offsets.append(len(synset_word_offsets) - 1)
+    # проблемные синсеты идут в конце таблицы синсетов, после синсетов последнего кластера
+    for words in problem_synsets:
+        add_synset(words, [])
+
+    arrays = dict(zip(('strings', 'string_offsets'), strings.arrays()))
+    arrays.update({name: np.array(values, dtype=np.int64) for name, values in (
+        ('synset_words', synset_words), ('synset_word_offsets', synset_word_offsets),
+        ('synset_definitions', synset_definitions), ('synset_definition_offsets', synset_definition_offsets),
+        ('definition_ids', definition_ids), ('definition_words', definition_words),
+        ('definition_texts', definition_texts), ('cluster_offsets', cluster_offsets))})
+    arrays['centroids'] = np.asarray(centroids, dtype=np.float64)[:len(clusters)]
+
+    tmp_path = path.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name in ARRAYS:
+        np.save(os.path.join(tmp_path, name + '.npy'), arrays[name])
+    with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'threshold': threshold, 'processed_synsets': processed_synsets, 'clusters': len(clusters),
+                   'synsets': len(synset_word_offsets) - 1}, f, indent=2)
+
+    old_path = path.rstrip(os.sep) + '.old'
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+class ClustersSnapshot:
+    """
+    Снимок кластеров, сохраненный write_snapshot. Массивы читаются с диска через memory map, поэтому открытие
+    снимка не зависит от его размера, а синсеты собираются только при обращении к ним
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: каталог снимка
+        """
+        with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        for name in ARRAYS:
+            setattr(self, '_' + name, np.load(os.path.join(path, name + '.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self._cluster_offsets) - 1
+
+    @property
+    def threshold(self) -> float:
+        return self.meta['threshold']
+
+    @property
+    def processed_synsets(self) -> int:
+        return self.meta['processed_synsets']
+
+    @property
+    def centroids(self) -> np.ndarray:
+        """
+        :return: матрица центроидов кластеров (только для чтения)
+        """
+        return self._centroids
+
+    def cluster_sizes(self) -> np.ndarray:
+        return np.diff(self._cluster_offsets)
+
+    def cluster(self, idx: int) -> List[NewSynset]:
+        """
+        :param idx: номер кластера
+        :return: синсеты кластера
+        """
+        return [self.synset(i) for i in range(self._cluster_offsets[idx], self._cluster_offsets[idx + 1])]
+
+    def clusters(self) -> List[List[NewSynset]]:
+        return [self.cluster(idx) for idx in range(len(self))]
+
+    def problem_synsets(self) -> List[List[str]]:
+        """
+        :return: синсеты (списки слов), для которых не удалось извлечь вектор
+        """
+        return [self.synset_words(i) for i in range(self._cluster_offsets[-1], len(self._synset_word_offsets) - 1)]
+
+    def synset_words(self, idx: int) -> List[str]:
+        return [self.string(s) for s in self._synset_words[self._synset_word_offsets[idx]:
+                                                           self._synset_word_offsets[idx + 1]]]
+
+    def synset(self, idx: int) -> NewSynset:
+        rows = self._synset_definitions[self._synset_definition_offsets[idx]:self._synset_definition_offsets[idx + 1]]
+        definitions = [Definition(int(self._definition_ids[r]), self.string(self._definition_words[r]),
+                                  self.string(self._definition_texts[r])) for r in rows]
+        return NewSynset(self.synset_words(idx), definitions)
+
+    def string(self, idx: int) -> str:
+        return bytes(self._strings[self._string_offsets[idx]:self._string_offsets[idx + 1]]).decode('utf-8')
@@ -1,10 +1,13 @@
 from typing import List
 
 import numpy as np
+import pandas as pd
 
 from apply.cluster import Cluster
+from apply.snapshot import ClustersSnapshot, write_snapshot
 from db.data.manager import load_alchemy, load_fasttext_bin
 from models.layer_model.model import NewSynset
+from models.similarity import normalize_rows
 
 
 class DefDict:
@@ -23,18 +26,18 @@ class DefDict:
 
         for new_word in new_words_with_descriptions:
             self.__dictionary[new_word] = new_words_with_descriptions[new_word]
-        definitions = {x: self.__dictionary[x] for x in synset}
-        for word in definitions:
-            if definitions[word]:
-                for d in definitions[word]:
-                    d.is_linked = None
-        return definitions
+        return {x: self.__dictionary[x] for x in synset}
 
 
 class ClustersHolder:
     def __init__(self, threshold=0.4):
         self.__clusters = []
+        # центроиды кластеров построчно (заполнены первые len(self.__clusters) строк), чтобы схожесть синсета
+        # со всеми кластерами считалась одним матричным произведением
+        self.__centroids = np.zeros((0, 0))
         self.problem_synsets = []
+        # сколько синсетов передано в process_synsets, сохраняется в снимок, чтобы продолжить с этого места
+        self.processed_synsets = 0
         self.__fasttext = load_fasttext_bin('fasttext_model/araneum_none_fasttextcbow_300_5_2018.model')
         self.__threshold = threshold
 
@@ -44,7 +47,7 @@ class ClustersHolder:
         :param synsets: список синсетов
         :return: None
         """
-        where_to_add = {}
+        extracted = []
         for i, synset in enumerate(synsets):
             synset_vector = self.__extract_vector(synset)
             if type(synset_vector) != np.ndarray:
@@ -53,31 +56,90 @@ class ClustersHolder:
                 print(synset.words)
                 self.problem_synsets.append(synset.words)
                 continue
+            extracted.append((i, synset_vector))
 
-            if self.__clusters:
-                similarities = [c.similarity_to(synset, synset_vector) for c in self.__clusters]
-                max_similarity_idx = np.argmax(similarities)
-                # если синсет похож на какой-то кластер, то данный синсет будет в него добавлен
-                # иначе синсет породит новый кластер
-                if similarities[max_similarity_idx] >= self.__threshold:
-                    where_to_add[i] = (max_similarity_idx, synset_vector)
-                else:
-                    where_to_add[i] = (-1, synset_vector)
-            else:
+        where_to_add = {}
+        if extracted:
+            # синсеты сравниваются только с кластерами, которые были до обработки этого списка
+            similarities = self.similarities([vector for _, vector in extracted])
+            for column, (i, synset_vector) in enumerate(extracted):
                 where_to_add[i] = (-1, synset_vector)
+                if len(self.__clusters):
+                    max_similarity_idx = np.argmax(similarities[:, column])
+                    # если синсет похож на какой-то кластер, то данный синсет будет в него добавлен
+                    # иначе синсет породит новый кластер
+                    if similarities[max_similarity_idx, column] >= self.__threshold:
+                        where_to_add[i] = (max_similarity_idx, synset_vector)
 
         for synset_number in where_to_add:
             synset = synsets[synset_number]
             idx, vector = where_to_add[synset_number]
             if idx == -1:
                 self.__clusters.append(Cluster(synset, vector))
+                idx = len(self.__clusters) - 1
             else:
                 self.__clusters[idx].add(synset, vector)
+            self.__set_centroid(idx, self.__clusters[idx].centroid())
+        self.processed_synsets += len(synsets)
+
+    def similarities(self, vectors: List[np.ndarray]) -> np.ndarray:
+        """
+        :param vectors: векторы синсетов
+        :return: матрица, где [i, j] - средняя косинусная мера j-го синсета и синсетов i-го кластера
+        """
+        if not self.__clusters:
+            return np.zeros((0, len(vectors)))
+        return self.__centroids[:len(self.__clusters)] @ normalize_rows(np.array(vectors, dtype=np.float64)).T
+
+    def __set_centroid(self, idx: int, centroid: np.ndarray):
+        if idx >= self.__centroids.shape[0]:
+            grown = np.zeros((max(2 * self.__centroids.shape[0], 1024), len(centroid)))
+            if self.__centroids.size:
+                grown[:self.__centroids.shape[0]] = self.__centroids
+            self.__centroids = grown
+        self.__centroids[idx] = centroid
+
+    def save_clusters_to_frame(self, name='') -> pd.DataFrame:
+        """
+        :param name: если задано, таблица сохраняется в csv с этим именем
+        :return: таблица со столбцами cluster, words, def_ids, у проблемных синсетов cluster = -1
+        """
+        frame = {'cluster': [], 'words': [], 'def_ids': []}
+        for idx, cluster in enumerate(self.__clusters):
+            for synset in cluster.synsets():
+                frame['cluster'].append(idx)
+                frame['words'].append(';'.join(synset.words))
+                frame['def_ids'].append(';'.join(str(d.id) for d in synset.definitions or []))
+        for words in self.problem_synsets:
+            frame['cluster'].append(-1)
+            frame['words'].append(';'.join(words))
+            frame['def_ids'].append('')
+        frame = pd.DataFrame(frame)
+        if name:
+            frame.to_csv(name)
+        return frame
+
+    def save_snapshot(self, path: str):
+        """
+        сохраняет кластеры, их центроиды и проблемные синсеты в каталог path (см. apply/snapshot.py)
+        """
+        write_snapshot(path, [c.synsets() for c in self.__clusters], self.__centroids, self.problem_synsets,
+                       self.__threshold, self.processed_synsets)
 
-    def save_clusters_to_frame(self, name=''):
-        words = []
-        vectors = []
-        pass
+    def load_snapshot(self, path: str):
+        """
+        заменяет текущее состояние сохраненным снимком, после чего можно продолжить обработку синсетов,
+        начиная с processed_synsets
+        """
+        snapshot = ClustersSnapshot(path)
+        self.__threshold = snapshot.threshold
+        self.processed_synsets = snapshot.processed_synsets
+        self.problem_synsets = snapshot.problem_synsets()
+        self.__clusters = []
+        self.__centroids = np.zeros((0, 0))
+        for idx, synsets in enumerate(snapshot.clusters()):
+            self.__clusters.append(Cluster.restore(synsets, snapshot.centroids[idx]))
+            self.__set_centroid(idx, snapshot.centroids[idx])
 
     def __extract_vector(self, synset: NewSynset):
         """
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import create_synthetic_database
+from db.alchemy import Alchemy
+
+
+def lookup_per_word(alchemy: Alchemy, synset):
+    return {word: alchemy.get_word_definitions(word) or None for word in synset}
+
+
+def benchmark_definitions_lookup(synsets_count: int = 100, synset_size=(30, 30)):
+    """
+    сравнивает получение определений для синсетов по одному слову и одним запросом на синсет/на все синсеты сразу
+    на сгенерированной базе
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic.db')
+        synsets = create_synthetic_database(path, synsets_count=synsets_count, synset_size=synset_size)
+        alchemy = Alchemy(path)
+
+        start = time.perf_counter()
+        per_word = [lookup_per_word(alchemy, synset) for synset in synsets]
+        per_word_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bulk = [alchemy.get_words_definitions(synset) for synset in synsets]
+        bulk_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bulk_synsets = alchemy.get_synsets_words_definitions(synsets)
+        bulk_synsets_time = time.perf_counter() - start
+
+        as_ids = lambda result: [{w: [d.id for d in ds] if ds else None for w, ds in syn.items()} for syn in result]
+        assert as_ids(per_word) == as_ids(bulk) == as_ids(bulk_synsets)
+        alchemy.get_session().close()
+
+    words_count = sum(len(s) for s in synsets)
+    print('Синсетов: {}, слов: {}'.format(len(synsets), words_count))
+    print('По одному слову:       {:.3f} c ({:.1f} синсетов/c)'.format(per_word_time, len(synsets) / per_word_time))
+    print('Один запрос на синсет: {:.3f} c ({:.1f} синсетов/c)'.format(bulk_time, len(synsets) / bulk_time))
+    print('Все синсеты сразу:     {:.3f} c ({:.1f} синсетов/c)'.format(bulk_synsets_time,
+                                                                       len(synsets) / bulk_synsets_time))
+
+
+if __name__ == '__main__':
+    benchmark_definitions_lookup()
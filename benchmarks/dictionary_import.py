@@ -0,0 +1,80 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+import tqdm
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.synthetic import write_synthetic_dictionary
+from db.base import Base, Word, Definition, WordDefinitionRelation
+from db.parser import import_dictionary
+
+
+def orm_import(session, path: str, commit_every: int = 100) -> float:
+    """
+    загрузка словаря так, как это делалось раньше: ORM-объект на каждую строку и commit каждые commit_every статей
+    :return: время загрузки в секундах
+    """
+    start = time.perf_counter()
+    relations = []
+    word_index = definition_index = 1
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(tqdm.tqdm(f), start=1):
+            dict_entry = json.loads(line)
+            session.add(Word(dict_entry['word'][0], dict_entry['POS']))
+            session.add_all([Definition(d) for d in dict_entry['definition']])
+            for _ in dict_entry['definition']:
+                relations.append(WordDefinitionRelation(word_index, definition_index))
+                definition_index += 1
+            word_index += 1
+            if number % commit_every == 0:
+                session.commit()
+                session.add_all(relations)
+                relations.clear()
+    session.add_all(relations)
+    session.commit()
+    return time.perf_counter() - start
+
+
+def create_empty_database(path: str):
+    engine = create_engine('sqlite:///{}'.format(path))
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def benchmark_dictionary_import(entries_count: int = 1000000, orm_entries_count: int = 20000):
+    """
+    загружает сгенерированный словарь из entries_count статей через import_dictionary, а для сравнения
+    загружает первые orm_entries_count статей старым способом через ORM
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        dictionary_path = os.path.join(tmp, 'dictionary.jsonl')
+        start = time.perf_counter()
+        definitions_count = write_synthetic_dictionary(dictionary_path, entries_count)
+        print('Словарь: {} статей, {} определений, создан за {:.1f} c'.format(entries_count, definitions_count,
+                                                                             time.perf_counter() - start))
+        engine = create_empty_database(os.path.join(tmp, 'streaming.db'))
+        streaming = import_dictionary(engine, dictionary_path)
+        with engine.connect() as connection:
+            assert connection.execute(func.count(WordDefinitionRelation.id)).scalar() == definitions_count
+        engine.dispose()
+
+        orm_path = os.path.join(tmp, 'orm.jsonl')
+        with open(dictionary_path, encoding='utf-8') as source, open(orm_path, 'w', encoding='utf-8') as target:
+            orm_rows = 0
+            for _, line in zip(range(orm_entries_count), source):
+                target.write(line)
+                orm_rows += 1 + 2 * len(json.loads(line)['definition'])
+        engine = create_empty_database(os.path.join(tmp, 'orm.db'))
+        orm_seconds = orm_import(sessionmaker(bind=engine)(), orm_path)
+        engine.dispose()
+
+    print('import_dictionary: {:.1f} c, {:.0f} строк/c'.format(streaming['seconds'], streaming['rows_per_second']))
+    print('ORM ({} статей): {:.1f} c, {:.0f} строк/c'.format(orm_entries_count, orm_seconds, orm_rows / orm_seconds))
+
+
+if __name__ == '__main__':
+    benchmark_dictionary_import(*map(int, sys.argv[1:]))
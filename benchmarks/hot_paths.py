@@ -0,0 +1,112 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Tuple
+
+import pandas as pd
+
+from benchmarks.synthetic import RandomVectors, create_synthetic_database
+from db.alchemy import Alchemy
+from models.launcher import create_majority_row_model
+from models.layer_model.additional import Word2VecOrdering
+from models.layer_model.model import LayerModel
+from models.word_to_word.model import WordToWord
+
+SYNSET_SIZES = (5, 20, 100)
+
+
+def measure(function: Callable[[], Any], trace_memory: bool = True) -> Tuple[float, float, Any]:
+    """
+    :param function: замеряемый этап
+    :param trace_memory: запустить этап второй раз под tracemalloc, чтобы узнать пик памяти (tracemalloc
+    замедляет выполнение, поэтому время замеряется отдельно)
+    :return: время в секундах, пик выделенной памяти в Мб (None, если не замерялся), результат этапа
+    """
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    if not trace_memory:
+        return seconds, None, result
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak / 2 ** 20, result
+
+
+def extract_precomputed(model: LayerModel, synset_definition):
+    model.precompute_similarities(synset_definition)
+    try:
+        return model.extract_new_synsets(synset_definition)
+    finally:
+        model.clear_precomputed_similarities()
+
+
+def benchmark_hot_paths(synset_sizes: Iterable[int] = SYNSET_SIZES, synsets_count: int = 10,
+                        definitions_per_word=(1, 10), dimension: int = 300, trace_memory: bool = True,
+                        layer_model_max_size: int = 20, seed: int = 0) -> pd.DataFrame:
+    """
+    замеряет основные этапы моделей на сгенерированной базе и случайных векторах (RandomVectors) вместо
+    fasttext, поэтому не нужны ни data.db, ни araneum. Для каждого размера синсета создается своя база
+    :param synset_sizes: размеры синсетов (количество слов)
+    :param synsets_count: количество синсетов каждого размера
+    :param definitions_per_word: минимальное и максимальное количество определений у слова
+    :param dimension: размерность случайных векторов
+    :param trace_memory: замерять пик памяти
+    :param layer_model_max_size: до какого размера синсета замерять LayerModel без precompute_similarities
+    (на синсетах из 100 слов он тратит минуты на синсет)
+    :return: таблица: размер синсета, этап, время, время на синсет, пик памяти
+    """
+    vectors = RandomVectors(dimension, seed)
+    Word2VecOrdering.set_up(pretrained_model=vectors)
+    layer_model = LayerModel(0.45, None, pretrained_model=vectors)
+    layer_model.set_fasttext_definition_strategy('average')
+    majority_row_model = create_majority_row_model()
+    word_to_word = WordToWord(0.45, vectors)
+
+    rows = []
+    for size in synset_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'synthetic.db')
+            synsets = create_synthetic_database(path, words_count=max(5000, size * 10),
+                                                definitions_per_word=definitions_per_word,
+                                                synsets_count=synsets_count, synset_size=(size, size), seed=seed)
+            alchemy = Alchemy(path)
+            stages = OrderedDict()
+            stages['определения слов (Alchemy)'] = lambda: alchemy.get_synsets_words_definitions(synsets)
+            stages['упорядочивание (Word2VecOrdering)'] = \
+                lambda: Word2VecOrdering.order_words_sequences_using_average_sim(synsets)
+            stages['определения синсетов (Alchemy)'] = lambda: alchemy.get_synsets_definitions((1, synsets_count))
+            results = {}
+            for stage, function in stages.items():
+                seconds, peak, results[stage] = measure(function, trace_memory)
+                rows.append((size, stage, seconds, peak))
+
+            ordered_definitions = alchemy.get_synsets_words_definitions(results['упорядочивание (Word2VecOrdering)'])
+            _, synset_definitions = results['определения синсетов (Alchemy)']
+            stages = OrderedDict()
+            if size <= layer_model_max_size:
+                stages['LayerModel'] = lambda: [layer_model.extract_new_synsets(d) for d in ordered_definitions]
+            stages['LayerModel + precompute_similarities'] = \
+                lambda: [extract_precomputed(layer_model, d) for d in ordered_definitions]
+            stages['MajorityRowModel'] = lambda: majority_row_model.clean(synset_definitions)
+            stages['WordToWord'] = lambda: [word_to_word.extract_clusters(s) for s in synsets]
+            for stage, function in stages.items():
+                seconds, peak, _ = measure(function, trace_memory)
+                rows.append((size, stage, seconds, peak))
+            alchemy.get_session().close()
+
+    report = pd.DataFrame(rows, columns=['synset_size', 'stage', 'seconds', 'peak_mb'])
+    report.insert(3, 'ms_per_synset', report.seconds / synsets_count * 1000)
+    return report
+
+
+if __name__ == '__main__':
+    # python -m benchmarks.hot_paths [количество синсетов каждого размера]
+    with pd.option_context('display.width', 120, 'display.max_colwidth', 40):
+        print(benchmark_hot_paths(synsets_count=int(sys.argv[1]) if len(sys.argv) > 1 else 10).to_string(index=False))
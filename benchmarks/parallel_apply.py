@@ -0,0 +1,60 @@
+import filecmp
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Iterable
+
+import pandas as pd
+
+from apply.pipeline import BatchRunner, ParallelBatchRunner, MERGED_FILE
+from apply.structures import DefDict
+from models.layer_model.model import LayerModel
+
+
+def benchmark_parallel_apply(synsets_path: str, model: LayerModel, definitions_factory: Callable[[], DefDict] = DefDict,
+                             workers: Iterable[int] = (1, 2, 4, 8), chunk_size: int = 100):
+    """
+    сравнивает время обработки синсетов последовательно и в нескольких процессах и проверяет, что итоговые файлы
+    совпадают побайтово
+    :param synsets_path: csv с синсетами
+    :param model: модель
+    :param definitions_factory: создает словарь определений
+    :param workers: количество процессов в каждом замере
+    :param chunk_size: размер части
+    """
+    synsets_count = pd.read_csv(synsets_path).shape[0]
+    with tempfile.TemporaryDirectory() as tmp:
+        sequential_dir = os.path.join(tmp, 'sequential')
+        start = time.perf_counter()
+        BatchRunner(model, definitions_factory(), output_dir=sequential_dir, chunk_size=chunk_size).run(synsets_path)
+        sequential_time = time.perf_counter() - start
+
+        report = [('последовательно', sequential_time, True)]
+        for count in workers:
+            output_dir = os.path.join(tmp, 'workers_{}'.format(count))
+            start = time.perf_counter()
+            ParallelBatchRunner(model, definitions_factory, workers=count, output_dir=output_dir,
+                                chunk_size=chunk_size).run(synsets_path)
+            same = filecmp.cmp(os.path.join(sequential_dir, MERGED_FILE), os.path.join(output_dir, MERGED_FILE),
+                               shallow=False)
+            report.append(('процессов: {}'.format(count), time.perf_counter() - start, same))
+
+    print('-------------------------------------')
+    print('Синсетов: {}'.format(synsets_count))
+    for name, seconds, same in report:
+        print('{}: {:.2f} c, {:.1f} синсетов/c, ускорение {:.2f}, результат совпадает: {}'.format(
+            name, seconds, synsets_count / seconds, sequential_time / seconds, same))
+
+
+if __name__ == '__main__':
+    # первые строки yarn-synsets.csv, по умолчанию 2000
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+        pd.read_csv('yarn-synsets.csv', nrows=rows).to_csv(f, index=False)
+    layer_model = LayerModel(0.45, None)
+    layer_model.set_fasttext_definition_strategy('average')
+    try:
+        benchmark_parallel_apply(f.name, layer_model)
+    finally:
+        os.remove(f.name)
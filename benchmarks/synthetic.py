@@ -0,0 +1,129 @@
+import json
+import random
+import zlib
+from typing import List
+
+import numpy as np
+from sqlalchemy import create_engine
+
+from db.base import Base, Word, Definition, WordDefinitionRelation, Synset, SynsetWord
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_words(count: int, rng: random.Random, min_length: int = 3, max_length: int = 10) -> List[str]:
+    """
+    :param count: сколько уникальных слов нужно
+    :param rng: генератор случайных чисел
+    :return: лист уникальных случайных "слов" из кириллицы
+    """
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choice(ALPHABET) for _ in range(rng.randint(min_length, max_length))))
+    return sorted(words)
+
+
+def create_synthetic_database(path: str, words_count: int = 20000, definitions_per_word=(1, 10),
+                              synsets_count: int = 5000, synset_size=(2, 30), seed: int = 0) -> List[List[str]]:
+    """
+    создает sqlite базу со схемой из db/base.py, заполненную случайным словарем
+    :param path: путь до файла базы
+    :param words_count: количество слов в словаре
+    :param definitions_per_word: минимальное и максимальное количество определений у слова
+    :param synsets_count: количество синсетов
+    :param synset_size: минимальный и максимальный размер синсета
+    :param seed: зерно генератора, база детерминирована при одинаковых параметрах
+    :return: лист синсетов, каждый синсет - лист слов
+    """
+    rng = random.Random(seed)
+    engine = create_engine('sqlite:///{}'.format(path))
+    Base.metadata.create_all(engine)
+
+    words = random_words(words_count, rng)
+    # часть слов синсетов отсутствует в словаре, как и в настоящем ярне
+    absent = random_words(words_count // 10, random.Random(seed + 1), min_length=11, max_length=14)
+    gloss_vocabulary = words[:2000] + [',', '.', ';']
+
+    word_rows, definition_rows, relation_rows = [], [], []
+    for word_id, word in enumerate(words, start=1):
+        word_rows.append({'id': word_id, 'word': word, 'pos': 'noun'})
+        for _ in range(rng.randint(*definitions_per_word)):
+            definition_id = len(definition_rows) + 1
+            gloss = ' '.join(rng.choice(gloss_vocabulary) for _ in range(rng.randint(3, 15)))
+            definition_rows.append({'id': definition_id, 'definition': gloss})
+            relation_rows.append({'id': definition_id, 'word_id': word_id, 'definition_id': definition_id})
+
+    word_ids = {w: i for i, w in enumerate(words, start=1)}
+    synsets, synset_rows, synset_word_rows = [], [], []
+    for synset_id in range(1, synsets_count + 1):
+        synset = rng.sample(words, rng.randint(*synset_size) - 1) + [rng.choice(absent)]
+        synsets.append(synset)
+        synset_rows.append({'id': synset_id, 'synset': ';'.join(synset), 'grammar': 'n', 'domain': 'general',
+                            'yarn_id': synset_id})
+        synset_word_rows.extend({'synset_id': synset_id, 'word': w, 'word_id': word_ids.get(w)} for w in synset)
+
+    with engine.begin() as connection:
+        connection.execute(Word.__table__.insert(), word_rows)
+        connection.execute(Definition.__table__.insert(), definition_rows)
+        connection.execute(WordDefinitionRelation.__table__.insert(), relation_rows)
+        connection.execute(Synset.__table__.insert(), synset_rows)
+        connection.execute(SynsetWord.__table__.insert(), synset_word_rows)
+    engine.dispose()
+    return synsets
+
+
+def write_synthetic_dictionary(path: str, entries_count: int = 1000000, definitions_per_entry=(1, 4),
+                               seed: int = 0) -> int:
+    """
+    записывает случайный словарь в формате jsonl, как у словаря для db/parser.create_from_dictionary
+    :param path: путь до файла
+    :param entries_count: количество статей
+    :param definitions_per_entry: минимальное и максимальное количество определений у статьи
+    :param seed: зерно генератора
+    :return: количество определений в словаре
+    """
+    rng = random.Random(seed)
+    words = random_words(min(entries_count, 200000), rng)
+    gloss_vocabulary = words[:2000] + [',', '.']
+    definitions_count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(entries_count):
+            definitions = [' '.join(rng.choices(gloss_vocabulary, k=rng.randint(3, 15)))
+                           for _ in range(rng.randint(*definitions_per_entry))]
+            definitions_count += len(definitions)
+            f.write(json.dumps({'word': [rng.choice(words)], 'POS': 'noun', 'definition': definitions},
+                               ensure_ascii=False))
+            f.write('\n')
+    return definitions_count
+
+
+class RandomVectors:
+    """
+    Заглушка модели векторов с интерфейсом gensim (model[text], text in model, model.similarity): у каждого
+    токена свой случайный вектор, определяемый только токеном и seed, вектор текста - среднее векторов его
+    токенов, как у fasttext. Позволяет запускать модели без araneum fasttext
+    """
+
+    def __init__(self, dimension: int = 300, seed: int = 0):
+        self.vector_size = dimension
+        self.__seed = seed
+        self.__vectors = {}
+
+    def __token_vector(self, token: str) -> np.ndarray:
+        vector = self.__vectors.get(token)
+        if vector is None:
+            rng = np.random.default_rng([self.__seed, zlib.crc32(token.encode('utf-8'))])
+            vector = self.__vectors[token] = rng.standard_normal(self.vector_size).astype(np.float32)
+        return vector
+
+    def __getitem__(self, text: str) -> np.ndarray:
+        tokens = text.split() or [text]
+        return np.mean([self.__token_vector(token) for token in tokens], axis=0)
+
+    def __contains__(self, text: str) -> bool:
+        # fasttext строит вектор и для незнакомых слов
+        return True
+
+    def similarity(self, first: str, second: str) -> float:
+        first, second = self[first], self[second]
+        return float(np.dot(first, second) / (np.linalg.norm(first) * np.linalg.norm(second)))
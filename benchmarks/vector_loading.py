@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+from typing import Dict
+
+MODEL_PATH = 'fasttext_model/araneum_none_fasttextcbow_300_5_2018.model'
+
+# код, который выполняется в отдельном процессе, чтобы замеры памяти не зависели друг от друга
+LOADER_SCRIPT = '''
+import json, resource, sys, time
+from db.data import manager
+
+start = time.perf_counter()
+if sys.argv[1] == 'model':
+    model = manager.FastText.load(manager.os.path.join(manager.os.path.dirname(manager.__file__), sys.argv[2]))
+else:
+    model = manager.load_fasttext_vectors(manager.exported_vectors_path(sys.argv[2]))
+load_time = time.perf_counter() - start
+
+start = time.perf_counter()
+getattr(model, 'wv', model)['намерение, задуманное, но ещё не реализованное']
+first_vector_time = time.perf_counter() - start
+
+memory = {'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+try:
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            name, value = line.split(':', 1)
+            if name in ('Rss', 'Pss', 'Shared_Clean', 'Private_Dirty'):
+                memory[name.lower() + '_mb'] = int(value.split()[0]) / 1024
+except (OSError, ValueError):
+    pass
+print(json.dumps(dict(load_time=load_time, first_vector_time=first_vector_time, **memory)))
+'''
+
+
+def measure_loader(kind: str, model_path: str = MODEL_PATH) -> Dict[str, float]:
+    """
+    :param kind: 'model' - полная модель fasttext, 'vectors' - векторы из export_fasttext_vectors через mmap
+    :return: время загрузки и получения первого вектора, потребление памяти процессом
+    """
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+    output = subprocess.run([sys.executable, '-c', LOADER_SCRIPT, kind, model_path], check=True, cwd=root,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark_vector_loading(model_path: str = MODEL_PATH):
+    """
+    сравнивает загрузку полной модели fasttext и сохраненных из нее векторов. Если векторы еще не сохранены,
+    нужно сначала вызвать db.data.manager.export_fasttext_vectors(model_path)
+    """
+    for kind in ('model', 'vectors'):
+        result = measure_loader(kind, model_path)
+        print('{}:'.format(kind))
+        for name, value in result.items():
+            print('\t{}: {:.3f}'.format(name, value))
+
+
+if __name__ == '__main__':
+    benchmark_vector_loading(sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH)
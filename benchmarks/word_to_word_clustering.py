@@ -0,0 +1,94 @@
+import os
+import time
+from itertools import combinations
+from typing import Dict, FrozenSet, List
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from db.data.manager import load_fasttext_bin
+from evaluation.clusters import read_clusters
+from models.word_to_word.model import WordToWord
+
+FASTTEXT_PATH = 'fasttext_model/araneum_none_fasttextcbow_300_5_2018.model'
+CLUSTERS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'evaluation', '3to9.csv')
+
+
+def legacy_extract_clusters(model, source_words, threshold: float) -> List[List[str]]:
+    """
+    выделение кластеров так, как это делалось раньше: векторы и косинусные меры считаются заново
+    для каждой пары слов и для каждого кандидата на добавление в кластер
+    """
+    def is_similar(target_word, other_words):
+        similarities = cosine_similarity(np.array([model[target_word]]),
+                                         np.array([model[word] for word in other_words]))[0]
+        return np.mean(similarities) >= threshold
+
+    word_groups = [list(pair) for pair in combinations(source_words, 2) if is_similar(pair[0], [pair[1]])]
+    if not word_groups:
+        return [source_words]
+    clusters = []
+    for group in word_groups:
+        not_yet_included = list(set(source_words) - set(group))
+        while not_yet_included:
+            peek = not_yet_included.pop()
+            if is_similar(peek, group):
+                group.append(peek)
+        clusters.append(group)
+    return clusters
+
+
+def without_duplicates(clusters: List[List[str]]) -> List[List[str]]:
+    """
+    :return: кластеры, где из одинаковых по набору слов оставлен первый
+    """
+    seen = set()
+    result = []
+    for cluster in clusters:
+        if frozenset(cluster) not in seen:
+            seen.add(frozenset(cluster))
+            result.append(cluster)
+    return result
+
+
+def load_large_clusters(path: str = CLUSTERS_PATH, min_size: int = 50, max_size: int = 200) -> List[FrozenSet[str]]:
+    """
+    :return: наборы слов кластеров ярна, в которых от min_size до max_size слов
+    """
+    return [cluster['words'] for cluster in read_clusters(path).values()
+            if min_size <= len(cluster['words']) <= max_size]
+
+
+def benchmark_word_to_word(pretrained_model=None, threshold: float = 0.45, min_size: int = 50,
+                           max_size: int = 200, limit: int = 10) -> Dict[str, float]:
+    """
+    сравнивает время выделения кластеров старым способом и через одну матрицу схожести на кластерах 3to9.csv
+    и проверяет, что результаты совпадают
+    :param pretrained_model: модель векторов, по умолчанию - fasttext, как в WordToWord
+    :param threshold: порог схожести
+    :param limit: сколько кластеров обрабатывать старым способом (он медленный)
+    :return: время обоих способов на одних и тех же кластерах
+    """
+    vectors = pretrained_model or load_fasttext_bin(FASTTEXT_PATH)
+    model = WordToWord(threshold, vectors)
+    clusters = load_large_clusters(min_size=min_size, max_size=max_size)[:limit]
+
+    legacy_time = new_time = 0.0
+    for words in clusters:
+        start = time.perf_counter()
+        legacy = legacy_extract_clusters(vectors, words, threshold)
+        legacy_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        extracted = model.extract_clusters(words)
+        new_time += time.perf_counter() - start
+        assert without_duplicates(legacy) == extracted
+
+    print('Кластеров: {}, слов: {}, порог: {}'.format(len(clusters), sum(len(c) for c in clusters), threshold))
+    print('По парам:          {:.3f} c'.format(legacy_time))
+    print('Матрица схожести:  {:.3f} c ({:.1f}x)'.format(new_time, legacy_time / new_time if new_time else 0))
+    return {'legacy_seconds': legacy_time, 'matrix_seconds': new_time}
+
+
+if __name__ == '__main__':
+    benchmark_word_to_word()
@@ -1,21 +1,12 @@
-import tqdm
-
 from db.data.manager import load_alchemy
-from db.base import SynsetWord, Word
+from db.repair import REPAIRS, run_repair
+
 
 def process_stripped_synset_words():
-    session = load_alchemy('data.db').get_session()
-    for s_word in tqdm.tqdm(session.query(SynsetWord).all()):
-        found_word = False
-        stripped = s_word.word.strip()
-        if stripped != s_word.word:
-            found_word = True
-            corresponding_dict_word = session.query(Word).filter(Word.word == stripped).one_or_none()
-            if corresponding_dict_word:
-                s_word.word_id = corresponding_dict_word.id
-            s_word.word = stripped
-        if found_word:
-            session.commit()
+    """
+    убирает пробелы по краям слов синсетов и связывает их со словами словаря (см. db/repair.py)
+    """
+    return run_repair(load_alchemy('data.db').get_session().get_bind(), REPAIRS['strip_synset_words'])
 
 
 if __name__ == '__main__':
@@ -1,22 +1,54 @@
 import re
-from typing import Dict, List, Tuple
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from sqlalchemy import create_engine, and_
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from db.base import Base, Word, User, Synonym, Edition, Synset, SynsetWord, Definition, WordDefinitionRelation
 from models.layer_model.base import Definition as ModelDefinition
 
+# ограничение на количество параметров в одном IN (...) - у старых версий sqlite их не больше 999
+IN_CHUNK_SIZE = 500
+
 
 class Alchemy:
-    def __init__(self, path=''):
-        engine = create_engine('sqlite:///{}'.format(path))
+    def __init__(self, path='', scoped=False, pool_size=5):
+        """
+        :param path: путь до файла базы
+        :param scoped: для сервера - у каждого потока своя сессия (scoped_session), соединения берутся из пула
+        и возвращаются в него после remove_session
+        :param pool_size: размер пула соединений для scoped
+        """
+        if scoped:
+            engine = create_engine('sqlite:///{}'.format(path), poolclass=QueuePool, pool_size=pool_size,
+                                   connect_args={'check_same_thread': False})
+        else:
+            engine = create_engine('sqlite:///{}'.format(path))
         Base.metadata.bind = engine
         DBSession = sessionmaker(bind=engine)
-        self.__session = DBSession()
+        self.__engine = engine
+        self.__scoped = scoped
+        # scoped_session передает query, commit и т.д. сессии текущего потока
+        self.__session = scoped_session(DBSession) if scoped else DBSession()
 
     def get_session(self):
-        return self.__session
+        return self.__session() if self.__scoped else self.__session
+
+    def remove_session(self):
+        """
+        закрывает сессию текущего потока (для scoped), ее соединение возвращается в пул
+        """
+        if self.__scoped:
+            self.__session.remove()
+
+    def dispose(self):
+        """
+        закрывает все соединения пула. Нужно вызывать перед fork, чтобы процессы не делили соединения с базой
+        """
+        self.remove_session()
+        self.__engine.dispose()
 
     def get_synsets_definitions(self, synset_id_range: Tuple[int, int] = (1,)) -> Tuple[List[int],
                                                                                         List[Dict[str, List[ModelDefinition]]]]:
@@ -78,23 +110,64 @@ class Alchemy:
         :param word: слово
         :return: список определений слова
         """
-        definitions = self.__session.query(Definition).filter(Word.word == word) \
-            .filter(Word.id == WordDefinitionRelation.word_id) \
-            .filter(WordDefinitionRelation.definition_id == Definition.id).all()
-        word_definitions = [] if not definitions else [ModelDefinition(x.id, word, x.definition)
-                                                       for x in definitions if re.sub(r'[^\w\s]','', x.definition)]
-        return word_definitions
-
-    def get_words_definitions(self, words: List[str]):
-        result = {}
-        for word in words:
-            definitions = self.get_word_definitions(word)
-            if not definitions:
-                result[word] = None
-            else:
-                result[word] = definitions
+        return self.get_words_definitions([word])[word] or []
+
+    def get_words_definitions(self, words: Iterable[str]) -> Dict[str, Optional[List[ModelDefinition]]]:
+        """
+        возвращает определения сразу для всех слов одним запросом с IN (...) вместо отдельного запроса на каждое слово
+        :param words: слова (например, слова синсета)
+        :return: словарь, где ключ - слово, значение - список определений слова. Если определений в базе нет,
+        то значение - None
+        """
+        words = list(dict.fromkeys(words))
+        found = self.__query_words_definitions(words)
+        return {word: found.get(word) or None for word in words}
+
+    def get_synsets_words_definitions(self, synsets: List[List[str]]) -> List[Dict[str, Optional[List[ModelDefinition]]]]:
+        """
+        то же, что и get_words_definitions, но сразу для нескольких синсетов: все слова всех синсетов
+        запрашиваются из базы вместе
+        :param synsets: лист синсетов, каждый синсет - лист слов
+        :return: лист словарей (по одному на синсет) такого же вида, как у get_words_definitions
+        """
+        found = self.__query_words_definitions(list(dict.fromkeys(w for synset in synsets for w in synset)))
+        result = []
+        for synset in synsets:
+            result.append({word: found.get(word) or None for word in synset})
+        return result
+
+    def __query_words_definitions(self, words: List[str]) -> Dict[str, List[ModelDefinition]]:
+        """
+        :param words: уникальные слова
+        :return: словарь слово - определения, в нем есть только те слова, у которых нашлись определения.
+        Определения, состоящие только из знаков препинания, отбрасываются
+        """
+        result = defaultdict(list)
+        for start in range(0, len(words), IN_CHUNK_SIZE):
+            rows = self.__session.query(Word.word, Definition.id, Definition.definition) \
+                .filter(Word.word.in_(words[start:start + IN_CHUNK_SIZE])) \
+                .filter(Word.id == WordDefinitionRelation.word_id) \
+                .filter(WordDefinitionRelation.definition_id == Definition.id) \
+                .distinct() \
+                .order_by(Definition.id) \
+                .all()
+            for word, def_id, definition in rows:
+                if re.sub(r'[^\w\s]', '', definition):
+                    result[word].append(ModelDefinition(def_id, word, definition))
         return result
 
+    def get_synset_words(self, yarn_id: int) -> List[str]:
+        """
+        :param yarn_id: id синсета в ярне
+        :return: слова синсета в порядке их добавления в базу
+        """
+        rows = self.__session.query(SynsetWord.word) \
+            .filter(SynsetWord.synset_id == Synset.id) \
+            .filter(Synset.yarn_id == yarn_id) \
+            .order_by(SynsetWord.id) \
+            .all()
+        return list(dict.fromkeys(word for word, in rows))
+
     def get_concatenated_synsets_by_yarn_ids(self, yarnd_ids: List[int]):
         result = set()
         for idx in yarnd_ids:
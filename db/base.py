@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -18,7 +18,7 @@ class User(Base):
 class Word(Base):
     __tablename__ = 'word'
     id = Column(Integer, primary_key=True)
-    word = Column(String)
+    word = Column(String, index=True)
     pos = Column(String)
 
     def __init__(self, word, pos):
@@ -41,6 +41,8 @@ class Definition(Base):
     __tablename__ = 'definition'
     id = Column(Integer, primary_key=True)
     definition = Column(String)
+    # нормализованные токены определения через пробел, заполняются db/precompute.py
+    normalized = Column(String)
 
     def __init__(self, definition):
         self.definition = definition
@@ -52,8 +54,8 @@ class Definition(Base):
 class WordDefinitionRelation(Base):
     __tablename__ = 'wordDefinitionRelation'
     id = Column(Integer, primary_key=True)
-    word_id = Column(Integer, ForeignKey('word.id'))
-    definition_id = Column(Integer, ForeignKey('definition.id'))
+    word_id = Column(Integer, ForeignKey('word.id'), index=True)
+    definition_id = Column(Integer, ForeignKey('definition.id'), index=True)
 
     def __init__(self, word_id, definition_id):
         self.word_id = word_id
@@ -66,7 +68,7 @@ class Synset(Base):
     synset = Column(String)
     grammar = Column(String)
     domain = Column(String)
-    yarn_id = Column(Integer)
+    yarn_id = Column(Integer, index=True)
 
     def __init__(self, synset, grammar, domain, yarn_id):
         '''
@@ -81,9 +83,9 @@ class Synset(Base):
 class SynsetWord(Base):
     __tablename__ = 'synsetWord'
     id = Column(Integer, primary_key=True)
-    synset_id = Column(Integer, ForeignKey('synset.id'))
+    synset_id = Column(Integer, ForeignKey('synset.id'), index=True)
     word = Column(String)
-    word_id = Column(Integer, ForeignKey('word.id'))
+    word_id = Column(Integer, ForeignKey('word.id'), index=True)
 
     def __init__(self, synset_id, word, word_id):
         self.synset_id = synset_id
@@ -115,6 +117,32 @@ class Edition(Base):
         self.datetime = datetime
 
 
+class CleanedSynset(Base):
+    __tablename__ = 'cleanedSynset'
+    __table_args__ = (UniqueConstraint('synset_id', 'model_version'),)
+    id = Column(Integer, primary_key=True)
+    synset_id = Column(Integer, ForeignKey('synset.id'), index=True)
+    yarn_id = Column(Integer, index=True)
+    model_version = Column(String)
+    # слова через ';'
+    clean = Column(String)
+    dropped = Column(String)
+
+    def __init__(self, synset_id, yarn_id, model_version, clean, dropped):
+        '''
+        :param synset_id: id синсета из таблицы synset
+        :param yarn_id: id синсета в ярне
+        :param model_version: Model.version() модели, которая обработала синсет
+        :param clean: слова, оставленные моделью, через ';'
+        :param dropped: слова, отброшенные моделью, через ';'
+        '''
+        self.synset_id = synset_id
+        self.yarn_id = yarn_id
+        self.model_version = model_version
+        self.clean = clean
+        self.dropped = dropped
+
+
 if __name__ == '__main__':
     engine = create_engine('sqlite:///data.db')
     Base.metadata.create_all(engine)
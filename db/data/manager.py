@@ -5,9 +5,11 @@ import pandas as pd
 from gensim.models import FastText, Word2Vec, KeyedVectors
 
 from db.alchemy import Alchemy
+from models.definition_vectors import DefinitionVectors
 
 __FASTTEXT_MODEL = None
 __WORD2VEC_MODEL = None
+__DEFINITION_VECTORS = None
 
 
 def load_text_file(file_name: str) -> str:
@@ -19,13 +21,60 @@ def load_json_file(file_name: str):
     return json.load(open(os.path.join(os.path.dirname(__file__), file_name)))
 
 
+def exported_vectors_path(model_path: str) -> str:
+    """
+    :param model_path: путь до модели fasttext
+    :return: путь, по которому export_fasttext_vectors сохраняет векторы этой модели
+    """
+    return model_path + '.vectors'
+
+
+def export_fasttext_vectors(model_path: str, with_ngrams: bool = True) -> str:
+    """
+    сохраняет из полной модели fasttext только векторы (KeyedVectors) рядом с моделью. Большие массивы пишутся
+    отдельными .npy файлами, поэтому при загрузке они отображаются в память (mmap) и разделяются между процессами
+    через page cache.
+    :param model_path: путь до модели fasttext относительно db/data
+    :param with_ngrams: сохранять ли таблицу n-грамм. Без нее векторы есть только у слов из словаря модели,
+    а для определений (строк из нескольких слов) и незнакомых слов векторов не будет
+    :return: путь до сохраненных векторов
+    """
+    model = FastText.load(os.path.join(os.path.dirname(__file__), model_path))
+    vectors_path = os.path.join(os.path.dirname(__file__), exported_vectors_path(model_path))
+    if with_ngrams:
+        vectors = model.wv
+    else:
+        words = getattr(model.wv, 'index_to_key', None) or model.wv.index2word
+        vectors = KeyedVectors(model.wv.vector_size)
+        add_vectors = getattr(vectors, 'add_vectors', None) or vectors.add
+        add_vectors(words, model.wv.vectors)
+    vectors.save(vectors_path, sep_limit=0)
+    return vectors_path
+
+
+def load_fasttext_vectors(vectors_path: str):
+    """
+    загружает векторы, сохраненные export_fasttext_vectors, через mmap: массивы не копируются в память процесса
+    :param vectors_path: путь до векторов относительно db/data
+    """
+    # сохраненный класс (KeyedVectors или FastTextKeyedVectors с n-граммами) восстанавливается из файла
+    return KeyedVectors.load(os.path.join(os.path.dirname(__file__), vectors_path), mmap='r')
+
+
 def load_fasttext_bin(model_path: str):
+    """
+    загружает модель один раз на процесс. Если для модели есть векторы, сохраненные export_fasttext_vectors,
+    то вместо полной модели загружаются они (через mmap) - интерфейс для получения векторов и схожести тот же
+    """
     global __FASTTEXT_MODEL
 
     if __FASTTEXT_MODEL:
         return __FASTTEXT_MODEL
 
-    __FASTTEXT_MODEL = FastText.load(os.path.join(os.path.dirname(__file__), model_path))
+    if os.path.exists(os.path.join(os.path.dirname(__file__), exported_vectors_path(model_path))):
+        __FASTTEXT_MODEL = load_fasttext_vectors(exported_vectors_path(model_path))
+    else:
+        __FASTTEXT_MODEL = FastText.load(os.path.join(os.path.dirname(__file__), model_path))
     return __FASTTEXT_MODEL
 
 
@@ -37,6 +86,20 @@ def load_word2vec_bin(model_path: str):
     return load_fasttext_bin(model_path)
 
 
+def load_definition_vectors(store_path: str = 'definition_vectors'):
+    """
+    :param store_path: каталог хранилища векторов определений (см. models/definition_vectors.py)
+    :return: хранилище, загруженное один раз на процесс
+    """
+    global __DEFINITION_VECTORS
+
+    if __DEFINITION_VECTORS is not None:
+        return __DEFINITION_VECTORS
+
+    __DEFINITION_VECTORS = DefinitionVectors(os.path.join(os.path.dirname(__file__), store_path))
+    return __DEFINITION_VECTORS
+
+
 def load_alchemy(db_path: str) -> Alchemy:
     return Alchemy(os.path.join(os.path.dirname(__file__), db_path))
 
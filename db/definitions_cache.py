@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from db.alchemy import Alchemy
+
+# сколько слов хранится в кэше одного процесса
+CACHE_SIZE = 100000
+
+
+class WordDefinitionsCache:
+    """
+    Общий для всех запросов процесса LRU-кэш: слово - тексты его определений. Слова, которых нет в кэше,
+    запрашиваются из базы одним запросом (Alchemy.get_words_definitions)
+    """
+
+    def __init__(self, alchemy: Alchemy, max_size: int = CACHE_SIZE):
+        """
+        :param alchemy: подключение к базе
+        :param max_size: максимальное количество слов в кэше
+        """
+        self.__alchemy = alchemy
+        self.__max_size = max_size
+        self.__definitions = OrderedDict()
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, words: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        :param words: слова
+        :return: словарь слово - тексты определений (пустой лист, если определений нет) в порядке words
+        """
+        words = list(dict.fromkeys(words))
+        result = {}
+        with self.__lock:
+            for word in words:
+                if word in self.__definitions:
+                    self.__definitions.move_to_end(word)
+                    result[word] = self.__definitions[word]
+            self.hits += len(result)
+            self.misses += len(words) - len(result)
+
+        missing = [word for word in words if word not in result]
+        if missing:
+            found = self.__alchemy.get_words_definitions(missing)
+            with self.__lock:
+                for word in missing:
+                    result[word] = [d.definition for d in found[word] or []]
+                    self.__definitions[word] = result[word]
+                    self.__definitions.move_to_end(word)
+                while len(self.__definitions) > self.__max_size:
+                    self.__definitions.popitem(last=False)
+        return {word: result[word] for word in words}
+
+    def __len__(self):
+        return len(self.__definitions)
+
+    def clear(self):
+        with self.__lock:
+            self.__definitions.clear()
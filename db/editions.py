@@ -0,0 +1,170 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, event
+
+from db.base import CleanedSynset, Edition, Synset
+
+# сколько правок пишется в одной транзакции
+BATCH_SIZE = 200
+# сколько секунд правка может ждать записи после того, как попала в очередь
+MAX_DELAY = 0.5
+
+
+def _to_string(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+class EditionWriter:
+    """
+    Записывает правки пользователей в таблицу edition. Запрос только кладет правку в очередь, а отдельный поток
+    записывает накопившиеся правки одной транзакцией (не реже, чем раз в max_delay секунд), поэтому запросы
+    не ждут друг друга на блокировке записи sqlite. В той же транзакции из cleanedSynset удаляются ответы модели
+    для исправленных синсетов. База переводится в режим WAL, чтобы запись не мешала чтению.
+    В режиме durable submit ждет, пока транзакция с правкой будет записана на диск (synchronous = FULL)
+    """
+
+    def __init__(self, db_path: str, batch_size: int = BATCH_SIZE, max_delay: float = MAX_DELAY,
+                 durable: bool = False):
+        """
+        :param db_path: путь до файла базы
+        :param batch_size: максимальное количество правок в одной транзакции
+        :param max_delay: максимальное время ожидания правки в очереди, в секундах
+        :param durable: подтверждать правку только после записи на диск
+        """
+        self.__db_path = db_path
+        self.__batch_size = batch_size
+        self.__max_delay = max_delay
+        self.__durable = durable
+        self.__queue = queue.Queue()
+        self.__thread = None
+        self.__pid = None
+        self.__lock = threading.Lock()
+        self.__metrics = {'submitted': 0, 'written': 0, 'failed': 0, 'batches': 0, 'flush_seconds': 0.0,
+                          'max_flush_seconds': 0.0, 'max_latency_seconds': 0.0}
+
+    @property
+    def durable(self) -> bool:
+        return self.__durable
+
+    def submit(self, yarn_id: int, edited_synset: str, user_id: Optional[int] = None,
+               timeout: Optional[float] = None) -> Future:
+        """
+        ставит правку в очередь на запись
+        :param yarn_id: id синсета в ярне
+        :param edited_synset: слова синсета после правки через ';'
+        :param user_id: id пользователя
+        :param timeout: для durable - сколько секунд ждать записи
+        :return: Future, результат которого становится известен после записи. В режиме durable к моменту
+        возврата правка уже записана (или Future содержит ошибку)
+        :raises: в режиме durable - ошибку записи или concurrent.futures.TimeoutError, если правка не записана
+        за timeout секунд
+        """
+        self.__ensure_started()
+        future = Future()
+        self.__queue.put((time.perf_counter(), future, {'user_id': user_id, 'yarn_id': yarn_id,
+                                                        'edited_synset': edited_synset,
+                                                        'datetime': datetime.now(timezone.utc)}))
+        with self.__lock:
+            self.__metrics['submitted'] += 1
+        if self.__durable:
+            future.result(timeout)
+        return future
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        :return: длина очереди, количество записанных правок и транзакций, время записи
+        """
+        with self.__lock:
+            metrics = dict(self.__metrics)
+        metrics['queue_depth'] = self.__queue.qsize()
+        metrics['average_flush_seconds'] = metrics['flush_seconds'] / metrics['batches'] if metrics['batches'] else 0.0
+        return metrics
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        записывает все правки из очереди и останавливает поток записи
+        """
+        if self.__thread is not None and self.__pid == os.getpid():
+            self.__queue.put(None)
+            self.__thread.join(timeout)
+            self.__thread = None
+
+    def __ensure_started(self):
+        # поток записи не переживает fork, поэтому в каждом процессе сервера он запускается заново
+        with self.__lock:
+            if self.__thread is None or self.__pid != os.getpid():
+                self.__pid = os.getpid()
+                self.__thread = threading.Thread(target=self.__run, name='edition-writer', daemon=True)
+                self.__thread.start()
+
+    def __create_engine(self):
+        engine = create_engine('sqlite:///{}'.format(self.__db_path))
+        synchronous = 'FULL' if self.__durable else 'NORMAL'
+
+        @event.listens_for(engine, 'connect')
+        def set_pragmas(connection, _):
+            cursor = connection.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous={}'.format(synchronous))
+            cursor.close()
+
+        return engine
+
+    def __run(self):
+        engine = self.__create_engine()
+        stopped = False
+        while not stopped:
+            item = self.__queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = item[0] + self.__max_delay
+            while len(batch) < self.__batch_size:
+                try:
+                    item = self.__queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopped = True
+                    break
+                batch.append(item)
+            self.__flush(engine, batch)
+        engine.dispose()
+
+    def __flush(self, engine, batch):
+        start = time.perf_counter()
+        try:
+            with engine.begin() as connection:
+                yarn_ids = list({edition['yarn_id'] for _, _, edition in batch})
+                synset_ids = dict(connection.execute(Synset.__table__.select()
+                                                     .with_only_columns([Synset.yarn_id, Synset.id])
+                                                     .where(Synset.yarn_id.in_(yarn_ids))).fetchall())
+                connection.execute(Edition.__table__.insert(), [
+                    {'user_id': edition['user_id'], 'synset_id': _to_string(synset_ids.get(edition['yarn_id'])),
+                     'edited_synset': edition['edited_synset'], 'datetime': edition['datetime']}
+                    for _, _, edition in batch])
+                # сохраненные ответы модели для исправленных синсетов больше не показываются
+                connection.execute(CleanedSynset.__table__.delete().where(CleanedSynset.yarn_id.in_(yarn_ids)))
+        except Exception as e:
+            print('Не удалось записать {} правок: {}'.format(len(batch), e))
+            with self.__lock:
+                self.__metrics['failed'] += len(batch)
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        end = time.perf_counter()
+        with self.__lock:
+            self.__metrics['written'] += len(batch)
+            self.__metrics['batches'] += 1
+            self.__metrics['flush_seconds'] += end - start
+            self.__metrics['max_flush_seconds'] = max(self.__metrics['max_flush_seconds'], end - start)
+            self.__metrics['max_latency_seconds'] = max(self.__metrics['max_latency_seconds'],
+                                                        end - min(submitted for submitted, _, _ in batch))
+        for _, future, _ in batch:
+            future.set_result(len(batch))
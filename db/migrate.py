@@ -0,0 +1,157 @@
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import create_engine, inspect, text
+
+from db.alchemy import Alchemy
+from db.base import Base, Synset, SynsetWord
+
+# запросы, на которых основана работа Alchemy, в виде sql для EXPLAIN QUERY PLAN
+QUERY_PLANS = {
+    'get_words_definitions': 'SELECT word.word, definition.id, definition.definition '
+                             'FROM word, "wordDefinitionRelation", definition '
+                             'WHERE word.word IN (:word) AND word.id = "wordDefinitionRelation".word_id '
+                             'AND "wordDefinitionRelation".definition_id = definition.id',
+    'get_synsets_definitions': 'SELECT * FROM synset JOIN "synsetWord" ON synset.id = "synsetWord".synset_id '
+                               'LEFT OUTER JOIN "wordDefinitionRelation" '
+                               'ON "wordDefinitionRelation".word_id = "synsetWord".word_id '
+                               'WHERE synset.id >= :left AND synset.id <= :right',
+    'get_concatenated_synsets_by_yarn_ids': 'SELECT * FROM synset WHERE synset.yarn_id = :yarn_id',
+}
+
+
+def get_missing_indexes(engine) -> List:
+    """
+    :param engine: движок sqlalchemy, подключенный к базе
+    :return: индексы, которые объявлены в db/base.py, но которых нет в базе
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def get_missing_columns(engine) -> List:
+    """
+    :param engine: движок sqlalchemy, подключенный к базе
+    :return: столбцы, которые объявлены в db/base.py, но которых нет в существующих таблицах базы
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        missing.extend(column for column in table.columns if column.name not in existing)
+    return missing
+
+
+def add_column(engine, column):
+    """
+    добавляет столбец в существующую таблицу (значения в старых строках - NULL)
+    """
+    column_type = column.type.compile(dialect=engine.dialect)
+    with engine.begin() as connection:
+        connection.execute(text('ALTER TABLE "{}" ADD COLUMN "{}" {}'.format(column.table.name, column.name,
+                                                                            column_type)))
+
+
+def explain_queries(engine) -> Dict[str, List[str]]:
+    """
+    :return: словарь: название запроса - план его выполнения в sqlite
+    """
+    params = {'word': '', 'left': 1, 'right': 1, 'yarn_id': 1}
+    with engine.connect() as connection:
+        return {name: [row[-1] for row in connection.execute(text('EXPLAIN QUERY PLAN ' + sql), params)]
+                for name, sql in QUERY_PLANS.items()}
+
+
+def time_queries(alchemy: Alchemy, synsets_count: int = 20) -> Dict[str, float]:
+    """
+    замеряет время основных запросов Alchemy на первых synsets_count синсетах базы
+    :return: словарь: название запроса - время в секундах
+    """
+    session = alchemy.get_session()
+    synsets = session.query(Synset.id, Synset.yarn_id).order_by(Synset.id).limit(synsets_count).all()
+    if not synsets:
+        return {}
+    words = [w for w, in session.query(SynsetWord.word)
+             .filter(SynsetWord.synset_id.in_([s_id for s_id, _ in synsets])).all()]
+
+    timings = {}
+    start = time.perf_counter()
+    for word in words:
+        alchemy.get_word_definitions(word)
+    timings['get_word_definitions'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    alchemy.get_words_definitions(words)
+    timings['get_words_definitions'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    alchemy.get_synsets_definitions((synsets[0][0], synsets[-1][0]))
+    timings['get_synsets_definitions'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    alchemy.get_concatenated_synsets_by_yarn_ids([yarn_id for _, yarn_id in synsets])
+    timings['get_concatenated_synsets_by_yarn_ids'] = time.perf_counter() - start
+    return timings
+
+
+def print_report(title: str, plans: Dict[str, List[str]], timings: Dict[str, float]):
+    print('-------------------------------------')
+    print(title)
+    for name, plan in plans.items():
+        print('{}:'.format(name))
+        for step in plan:
+            print('\t{}'.format(step))
+    for name, seconds in timings.items():
+        print('{}: {:.4f} c'.format(name, seconds))
+
+
+def migrate(db_path: str) -> Tuple[List[str], Dict[str, float], Dict[str, float]]:
+    """
+    добавляет в существующую базу таблицы, столбцы и индексы из db/base.py, которых в ней еще нет.
+    Базу пересоздавать не нужно. До и после миграции печатаются планы и время основных запросов Alchemy
+    :param db_path: путь до файла базы
+    :return: имена созданных таблиц, столбцов и индексов, время запросов до и после миграции
+    """
+    engine = create_engine('sqlite:///{}'.format(db_path))
+    created = [table.name for table in Base.metadata.sorted_tables if not inspect(engine).has_table(table.name)]
+    for name in created:
+        print('Создается таблица {}'.format(name))
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables[name] for name in created])
+    for column in get_missing_columns(engine):
+        print('Добавляется столбец {}.{}'.format(column.table.name, column.name))
+        add_column(engine, column)
+        created.append('{}.{}'.format(column.table.name, column.name))
+
+    alchemy = Alchemy(db_path)
+    before = time_queries(alchemy)
+    print_report('До миграции', explain_queries(engine), before)
+
+    for index in get_missing_indexes(engine):
+        print('Создается индекс {}'.format(index.name))
+        index.create(bind=engine)
+        created.append(index.name)
+    if created:
+        with engine.begin() as connection:
+            connection.execute(text('ANALYZE'))
+
+    after = time_queries(alchemy)
+    print_report('После миграции', explain_queries(engine), after)
+
+    alchemy.get_session().close()
+    engine.dispose()
+    return created, before, after
+
+
+if __name__ == '__main__':
+    migrate(sys.argv[1] if len(sys.argv) > 1 else 'data.db')
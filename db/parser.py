@@ -1,6 +1,10 @@
 import json
 import csv
+import time
+from typing import Dict, List
+
 import tqdm
+from sqlalchemy import func, select, text
 
 from db.alchemy import Alchemy
 from db.base import Word, Definition, WordDefinitionRelation, Synset, SynsetWord
@@ -8,62 +12,190 @@ from db.base import Word, Definition, WordDefinitionRelation, Synset, SynsetWord
 alchemy = Alchemy(path='data.db')
 
 
-def create_from_dictionary(path, session_add_bound):
-    session = alchemy.get_session()
-    session_counter = 0
-    word_index = 1
-    definition_index = 1
-    word_id_buffer = set()
-    relations_buffer = []
-    with open(path) as f:
-        for line in tqdm.tqdm(f):
-            if session_counter == session_add_bound:
-                session.commit()
-                session.add_all([WordDefinitionRelation(w, d) for w, d in relations_buffer])
-                relations_buffer.clear()
-                session_counter = 0
-            dict_entry = json.loads(line)
-            if 'definition' in dict_entry and dict_entry['word']:
-                definitions = [Definition(d) for d in dict_entry['definition']]
-                word_entry = dict_entry['word'][0]
-                words = []
-                if word_entry in word_id_buffer:
-                    word_id_buffer.clear()
-                    word_id_buffer.add(word_entry)
-                else:
-                    word = Word(word_entry, dict_entry['POS'])
-                    words.append(word)
-                for _ in definitions:
-                    relations_buffer.append((word_index, definition_index))
-                    definition_index += 1
-                word_index += 1
-                session.add_all(words)
-                session.add_all(definitions)
-                session_counter += 1
-    session.commit()
-
-
-def create_synsets(csv_path, session_add_bound):
-    session_counter = 0
-    synset_index = 1
-    words_buffer = []
-    session = alchemy.get_session()
-    with open(csv_path) as f:
-        reader = csv.DictReader(f, delimiter=',')
-        for row in tqdm.tqdm(reader):
-            if session_counter == session_add_bound:
-                session.commit()
-                for s_id, word in words_buffer:
-                    word_object = session.query(Word).filter(Word.word == word).first()
-                    word_id = word_object.id if word_object else None
-                    session.add(SynsetWord(s_id, word, word_id))
-                words_buffer.clear()
-                session_counter = 0
-            words_buffer.extend((synset_index, word) for word in row['words'].split(';'))
-            session.add(Synset(row['words'], row['grammar'], row['domain'], row['id']))
-            session_counter += 1
-            synset_index += 1
-    session.commit()
+def _begin_immediate(connection):
+    """
+    открывает транзакцию и сразу берет блокировку записи (BEGIN IMMEDIATE): до ее конца другие соединения
+    не могут писать в базу
+    :return: транзакция sqlalchemy, commit/rollback которой завершает и транзакцию sqlite
+    """
+    transaction = connection.begin()
+    connection.execute(text('BEGIN IMMEDIATE'))
+    return transaction
+
+
+def _max_id(connection, table) -> int:
+    return connection.execute(select([func.max(table.c.id)])).scalar() or 0
+
+
+def _insert_rows(connection, table, rows: List[dict]) -> range:
+    """
+    вставляет строки без id, id назначает sqlite (max(id) + 1 для каждой следующей строки). Вызывается внутри
+    _begin_immediate, поэтому между вставками никто не пишет в таблицу и id пачки идут подряд
+    :return: id вставленных строк в порядке rows
+    """
+    first = _max_id(connection, table) + 1
+    connection.execute(table.insert(), rows)
+    last = _max_id(connection, table)
+    if last - first + 1 != len(rows):
+        raise RuntimeError('sqlite назначил строкам таблицы {} id не подряд'.format(table.name))
+    return range(first, last + 1)
+
+
+def import_dictionary(engine, path: str, transaction_size: int = 200000, batch_size: int = 10000) -> Dict[str, float]:
+    """
+    потоково загружает словарь в формате jsonl (строка - {"word": [...], "POS": ..., "definition": [...]})
+    в таблицы word, definition и wordDefinitionRelation. Строки вставляются пачками через executemany в больших
+    транзакциях, на время загрузки включаются WAL и synchronous = OFF. id слов и определений назначает sqlite,
+    связи строятся по id, прочитанным после вставки каждой пачки, поэтому словарь можно загружать и в непустую базу
+    :param engine: движок sqlalchemy, подключенный к базе
+    :param path: путь до словаря
+    :param transaction_size: сколько статей словаря загружается в одной транзакции
+    :param batch_size: сколько строк передается в один executemany
+    :return: количество добавленных строк каждой таблицы, время загрузки и скорость (строк/c)
+    """
+    word_table, definition_table, relation_table = Word.__table__, Definition.__table__, WordDefinitionRelation.__table__
+    counts = {'entries': 0, 'words': 0, 'definitions': 0, 'relations': 0}
+    start = time.perf_counter()
+
+    with engine.connect() as connection:
+        synchronous = connection.execute(text('PRAGMA synchronous')).scalar()
+        connection.execute(text('PRAGMA journal_mode=WAL'))
+        connection.execute(text('PRAGMA synchronous=OFF'))
+        # статьи, которые еще не записаны: строка слова и его определения
+        entries = []
+
+        def flush():
+            if not entries:
+                return
+            word_ids = _insert_rows(connection, word_table, [word for word, _ in entries])
+            definitions = [{'definition': d} for _, word_definitions in entries for d in word_definitions]
+            definition_ids = iter(_insert_rows(connection, definition_table, definitions) if definitions else [])
+            relations = [{'word_id': word_id, 'definition_id': next(definition_ids)}
+                         for word_id, (_, word_definitions) in zip(word_ids, entries) for _ in word_definitions]
+            if relations:
+                connection.execute(relation_table.insert(), relations)
+            entries.clear()
+
+        transaction = _begin_immediate(connection)
+        try:
+            entries_in_transaction = definitions_in_batch = 0
+            with open(path, encoding='utf-8') as f:
+                for line in tqdm.tqdm(f):
+                    dict_entry = json.loads(line)
+                    if 'definition' not in dict_entry or not dict_entry['word']:
+                        continue
+                    entries.append(({'word': dict_entry['word'][0], 'pos': dict_entry['POS']},
+                                    dict_entry['definition']))
+                    counts['entries'] += 1
+                    counts['words'] += 1
+                    counts['definitions'] += len(dict_entry['definition'])
+                    entries_in_transaction += 1
+                    definitions_in_batch += len(dict_entry['definition'])
+                    if definitions_in_batch >= batch_size or len(entries) >= batch_size:
+                        flush()
+                        definitions_in_batch = 0
+                    if entries_in_transaction >= transaction_size:
+                        flush()
+                        definitions_in_batch = 0
+                        transaction.commit()
+                        transaction = _begin_immediate(connection)
+                        entries_in_transaction = 0
+            flush()
+            transaction.commit()
+        except BaseException:
+            transaction.rollback()
+            raise
+        finally:
+            # соединение может вернуться в пул, поэтому прежний режим записи восстанавливается
+            connection.execute(text('PRAGMA synchronous={}'.format(synchronous)))
+
+    counts['relations'] = counts['definitions']
+    counts['seconds'] = time.perf_counter() - start
+    rows = counts['words'] + counts['definitions'] + counts['relations']
+    counts['rows_per_second'] = rows / counts['seconds'] if counts['seconds'] else 0.0
+    print('Загружено статей: {}, строк: {} за {:.1f} c ({:.0f} строк/c)'.format(
+        counts['entries'], rows, counts['seconds'], counts['rows_per_second']))
+    return counts
+
+
+def create_from_dictionary(path, session_add_bound=200000):
+    """
+    загружает словарь в базу data.db (см. import_dictionary)
+    :param path: путь до словаря в формате jsonl
+    :param session_add_bound: сколько статей словаря загружается в одной транзакции
+    """
+    return import_dictionary(alchemy.get_session().get_bind(), path, transaction_size=session_add_bound)
+
+
+def load_word_ids(connection) -> Dict[str, int]:
+    """
+    :return: словарь слово - id слова из таблицы word (если слово встречается несколько раз - наименьший id)
+    """
+    rows = connection.execute(select([Word.__table__.c.word, func.min(Word.__table__.c.id)])
+                              .group_by(Word.__table__.c.word))
+    return {word: word_id for word, word_id in rows}
+
+
+def import_synsets(engine, csv_path: str, batch_size: int = 10000) -> Dict[str, float]:
+    """
+    загружает синсеты ярна (csv со столбцами id, words, grammar, domain) в таблицы synset и synsetWord за один
+    проход. Словарь слово - id загружается из базы один раз, поэтому для слов синсетов не нужны отдельные запросы.
+    Пробелы по краям слов синсетов убираются сразу (раньше это исправлял db/additional.py)
+    :param engine: движок sqlalchemy, подключенный к базе
+    :param csv_path: путь до csv с синсетами
+    :param batch_size: сколько строк передается в один executemany
+    :return: количество добавленных синсетов, слов синсетов, слов, не найденных в словаре, время загрузки
+    """
+    synset_table, synset_word_table = Synset.__table__, SynsetWord.__table__
+    counts = {'synsets': 0, 'synset_words': 0, 'unknown_words': 0}
+    start = time.perf_counter()
+
+    with engine.connect() as connection, _begin_immediate(connection):
+        word_ids = load_word_ids(connection)
+        # синсеты, которые еще не записаны: строка синсета и строки его слов без synset_id
+        synsets = []
+
+        def flush():
+            if not synsets:
+                return
+            synset_ids = _insert_rows(connection, synset_table, [synset for synset, _ in synsets])
+            connection.execute(synset_word_table.insert(), [dict(synset_word, synset_id=synset_id)
+                                                            for synset_id, (_, words) in zip(synset_ids, synsets)
+                                                            for synset_word in words])
+            synsets.clear()
+
+        words_in_batch = 0
+        with open(csv_path, encoding='utf-8') as f:
+            for row in tqdm.tqdm(csv.DictReader(f, delimiter=',')):
+                synset_words = []
+                for word in row['words'].split(';'):
+                    stripped = word.strip()
+                    word_id = word_ids.get(stripped, word_ids.get(word))
+                    synset_words.append({'word': stripped, 'word_id': word_id})
+                    counts['unknown_words'] += word_id is None
+                synsets.append(({'synset': row['words'], 'grammar': row['grammar'], 'domain': row['domain'],
+                                 'yarn_id': row['id']}, synset_words))
+                counts['synsets'] += 1
+                counts['synset_words'] += len(synset_words)
+                words_in_batch += len(synset_words)
+                if words_in_batch >= batch_size:
+                    flush()
+                    words_in_batch = 0
+        flush()
+
+    counts['seconds'] = time.perf_counter() - start
+    print('Загружено синсетов: {}, слов синсетов: {} (нет в словаре: {}) за {:.1f} c'.format(
+        counts['synsets'], counts['synset_words'], counts['unknown_words'], counts['seconds']))
+    return counts
+
+
+def create_synsets(csv_path, session_add_bound=10000):
+    """
+    загружает синсеты ярна в базу data.db (см. import_synsets)
+    :param csv_path: путь до csv с синсетами
+    :param session_add_bound: сколько строк передается в один executemany
+    """
+    return import_synsets(alchemy.get_session().get_bind(), csv_path, batch_size=session_add_bound)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,55 @@
+import sys
+
+import tqdm
+
+from db.alchemy import Alchemy
+from db.base import Definition
+from models.processing import simple_normalization_tokens, register_normalized_definitions
+
+
+def store_normalized_definitions(alchemy: Alchemy, batch_size: int = 10000, recompute: bool = False) -> int:
+    """
+    нормализует (pymorphy) все определения из базы и сохраняет токены через пробел в definition.normalized,
+    чтобы сервер и пакетная обработка не вызывали pymorphy для уже известных определений
+    :param alchemy: подключение к базе
+    :param batch_size: сколько определений обновляется в одной транзакции
+    :param recompute: пересчитать и те определения, у которых normalized уже заполнен
+    :return: количество обработанных определений
+    """
+    session = alchemy.get_session()
+    query = session.query(Definition.id, Definition.definition)
+    if not recompute:
+        query = query.filter(Definition.normalized.is_(None))
+    total = query.count()
+
+    processed = 0
+    last_id = 0
+    with tqdm.tqdm(total=total) as progress:
+        while True:
+            rows = query.filter(Definition.id > last_id).order_by(Definition.id).limit(batch_size).all()
+            if not rows:
+                break
+            session.bulk_update_mappings(Definition, [
+                {'id': def_id, 'normalized': ' '.join(simple_normalization_tokens(definition or ''))}
+                for def_id, definition in rows])
+            session.commit()
+            last_id = rows[-1][0]
+            processed += len(rows)
+            progress.update(len(rows))
+    return processed
+
+
+def load_normalized_definitions(alchemy: Alchemy) -> int:
+    """
+    загружает из базы нормализованные заранее определения в кэш models.processing
+    :param alchemy: подключение к базе
+    :return: количество загруженных определений
+    """
+    rows = alchemy.get_session().query(Definition.definition, Definition.normalized) \
+        .filter(Definition.normalized.isnot(None)).yield_per(10000)
+    return register_normalized_definitions((definition, normalized.split()) for definition, normalized in rows)
+
+
+if __name__ == '__main__':
+    print('Нормализовано {} определений'.format(
+        store_normalized_definitions(Alchemy(sys.argv[1] if len(sys.argv) > 1 else 'data.db'))))
@@ -0,0 +1,105 @@
+import sys
+from collections import namedtuple, OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import tqdm
+from sqlalchemy import create_engine, text
+
+# одна операция исправления: UPDATE table SET set_clause [FROM from_clause] WHERE where_clause.
+# Условия пишутся так, чтобы исправленная строка больше им не удовлетворяла - тогда количество строк
+# в режиме dry_run совпадает с количеством исправленных и повторный запуск ничего не меняет
+RepairStep = namedtuple('RepairStep', 'description table set_clause from_clause where_clause')
+Repair = namedtuple('Repair', 'name description steps')
+
+# все пробельные символы, которые убирает str.strip() (так слова очищаются в db/parser.import_synsets),
+# sqlite trim по умолчанию убирает только пробел
+WHITESPACE = ' || '.join('char({})'.format(ord(c)) for c in map(chr, range(0x110000)) if c.isspace())
+STRIPPED_WORD = 'trim("synsetWord".word, {})'.format(WHITESPACE)
+# слово словаря с наименьшим id среди одинаковых слов, чтобы UPDATE ... FROM находил ровно одну строку
+FIRST_WORD = 'dict_word.id = (SELECT min(id) FROM word WHERE word.word = dict_word.word)'
+
+REPAIRS = OrderedDict((repair.name, repair) for repair in [
+    Repair('strip_synset_words', 'убирает пробелы по краям слов синсетов и связывает их со словами словаря', [
+        RepairStep('слова, которые после удаления пробелов есть в словаре', 'synsetWord',
+                   'word = {}, word_id = dict_word.id'.format(STRIPPED_WORD), 'word AS dict_word',
+                   '"synsetWord".word != {0} AND dict_word.word = {0} AND {1}'.format(STRIPPED_WORD, FIRST_WORD)),
+        RepairStep('остальные слова с пробелами по краям', 'synsetWord',
+                   'word = {}'.format(STRIPPED_WORD), None,
+                   '"synsetWord".word != {0} AND NOT EXISTS (SELECT 1 FROM word WHERE word.word = {0})'.format(
+                       STRIPPED_WORD)),
+    ]),
+    Repair('relink_word_ids', 'связывает слова синсетов без word_id (или со ссылкой на удаленное слово) '
+                              'со словами словаря', [
+        RepairStep('слова синсетов без существующего слова словаря', 'synsetWord',
+                   'word_id = dict_word.id', 'word AS dict_word',
+                   'dict_word.word = "synsetWord".word AND {} AND ("synsetWord".word_id IS NULL OR NOT EXISTS '
+                   '(SELECT 1 FROM word WHERE word.id = "synsetWord".word_id))'.format(FIRST_WORD)),
+    ]),
+])
+
+
+def _count_sql(step: RepairStep) -> str:
+    tables = '"{}"'.format(step.table) + (', ' + step.from_clause if step.from_clause else '')
+    return 'SELECT count(*) FROM {} WHERE ({}) AND "{}".id BETWEEN :left AND :right'.format(
+        tables, step.where_clause, step.table)
+
+
+def _update_sql(step: RepairStep) -> str:
+    from_clause = ' FROM ' + step.from_clause if step.from_clause else ''
+    return 'UPDATE "{0}" SET {1}{2} WHERE ({3}) AND "{0}".id BETWEEN :left AND :right'.format(
+        step.table, step.set_clause, from_clause, step.where_clause)
+
+
+def run_repair(engine, repair: Repair, chunk_size: int = 50000, dry_run: bool = False) -> Dict[str, int]:
+    """
+    выполняет исправление одним UPDATE ... FROM на каждый диапазон id из chunk_size строк, каждый диапазон -
+    в своей транзакции (UPDATE ... FROM есть в sqlite начиная с 3.33)
+    :param engine: движок sqlalchemy, подключенный к базе
+    :param repair: исправление
+    :param chunk_size: сколько строк таблицы обрабатывается в одной транзакции
+    :param dry_run: только посчитать строки, которые будут исправлены
+    :return: словарь: описание операции - количество исправленных (для dry_run - найденных) строк
+    """
+    counts = OrderedDict((step.description, 0) for step in repair.steps)
+    for step in repair.steps:
+        with engine.connect() as connection:
+            low, high = connection.execute(text('SELECT min(id), max(id) FROM "{}"'.format(step.table))).fetchone()
+        if low is None:
+            continue
+        sql = text(_count_sql(step) if dry_run else _update_sql(step))
+        for left in tqdm.tqdm(range(low, high + 1, chunk_size), desc=step.description):
+            params = {'left': left, 'right': left + chunk_size - 1}
+            with engine.begin() as connection:
+                result = connection.execute(sql, params)
+                counts[step.description] += result.scalar() if dry_run else result.rowcount
+    return counts
+
+
+def run_repairs(engine, names: Optional[Iterable[str]] = None, chunk_size: int = 50000,
+                dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    """
+    :param engine: движок sqlalchemy, подключенный к базе
+    :param names: названия исправлений из REPAIRS, по умолчанию - все
+    :return: результаты run_repair для каждого исправления
+    """
+    results = OrderedDict()
+    for name in names or REPAIRS:
+        repair = REPAIRS[name]
+        print('{}: {}{}'.format(name, repair.description, ' (dry run)' if dry_run else ''))
+        results[name] = run_repair(engine, repair, chunk_size, dry_run)
+        for description, count in results[name].items():
+            print('\t{}: {}'.format(description, count))
+    return results
+
+
+def main(args: List[str]):
+    dry_run = '--dry-run' in args
+    args = [a for a in args if a != '--dry-run']
+    engine = create_engine('sqlite:///{}'.format(args[0] if args else 'data.db'))
+    run_repairs(engine, args[1:], dry_run=dry_run)
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    # python -m db.repair data.db [strip_synset_words relink_word_ids] [--dry-run]
+    main(sys.argv[1:])
@@ -0,0 +1,141 @@
+import sys
+from typing import Dict, List, Tuple
+
+import tqdm
+from sqlalchemy import and_
+
+from db.alchemy import Alchemy
+from db.base import CleanedSynset, Synset, SynsetWord
+
+# результат модели для синсета: yarn_id, оставленные слова, отброшенные слова
+CleanedResult = Tuple[int, List[str], List[str]]
+
+
+def _split(words: str) -> List[str]:
+    return words.split(';') if words else []
+
+
+class CleanedSynsetsCache:
+    """
+    Результаты Model.clean для синсетов, сохраненные в таблице cleanedSynset. Ключ - id синсета и версия модели,
+    поэтому результаты другой модели (или той же с другим порогом) не используются. Заполняется заранее
+    функцией precompute_cleaned_synsets, недостающие синсеты считаются при запросе и тоже сохраняются
+    """
+
+    def __init__(self, alchemy: Alchemy, model):
+        """
+        :param alchemy: подключение к базе
+        :param model: модель, результаты которой хранятся
+        """
+        self.__alchemy = alchemy
+        self.__model = model
+        self.__version = model.version()
+
+    def get_range(self, synset_id_range: Tuple[int, int]) -> Tuple[List[int], List[Tuple[List[str], List[str]]]]:
+        """
+        то же, что alchemy.get_synsets_definitions + model.clean, но посчитанные синсеты берутся из таблицы
+        :param synset_id_range: диапазон id синсетов
+        :return: yarn_id синсетов и ответы модели (оставленные и отброшенные слова) в порядке id синсетов
+        """
+        left, right = synset_id_range
+        synsets = synsets_in_range(self.__alchemy, left, right)
+        if not synsets:
+            raise IndexError("synsets' ids are out of range")
+        cached = self.get([synset_id for synset_id, _ in synsets])
+        missing = [synset_id for synset_id, _ in synsets if synset_id not in cached]
+        if missing:
+            cached.update(self.compute(missing))
+        results = [cached[synset_id] for synset_id, _ in synsets]
+        return [yarn_id for yarn_id, _, _ in results], [(clean, dropped) for _, clean, dropped in results]
+
+    def get(self, synset_ids: List[int]) -> Dict[int, CleanedResult]:
+        """
+        :param synset_ids: id синсетов
+        :return: сохраненные результаты для тех синсетов, которые уже посчитаны
+        """
+        rows = self.__alchemy.get_session().query(CleanedSynset) \
+            .filter(CleanedSynset.model_version == self.__version) \
+            .filter(CleanedSynset.synset_id.in_(synset_ids)) \
+            .all()
+        return {r.synset_id: (r.yarn_id, _split(r.clean), _split(r.dropped)) for r in rows}
+
+    def compute(self, synset_ids: List[int]) -> Dict[int, CleanedResult]:
+        """
+        применяет модель к синсетам и сохраняет результат
+        :param synset_ids: id синсетов
+        :return: результаты для этих синсетов
+        """
+        requested = set(synset_ids)
+        left, right = min(requested), max(requested)
+        # определения запрашиваются одним запросом для всего диапазона, лишние синсеты отбрасываются
+        synsets = synsets_in_range(self.__alchemy, left, right)
+        _, synset_definitions = self.__alchemy.get_synsets_definitions((left, right))
+        selected = [(synset, definitions) for synset, definitions in zip(synsets, synset_definitions)
+                    if synset[0] in requested]
+        answers = self.__model.clean([definitions for _, definitions in selected])
+        results = {synset_id: (yarn_id, list(clean), list(dropped))
+                   for (synset_id, yarn_id), (clean, dropped) in zip([s for s, _ in selected], answers)}
+        self.store(results)
+        return results
+
+    def store(self, results: Dict[int, CleanedResult]):
+        session = self.__alchemy.get_session()
+        # другой процесс мог успеть посчитать те же синсеты - тогда строка заменяется
+        session.execute(CleanedSynset.__table__.insert().prefix_with('OR REPLACE'),
+                        [{'synset_id': synset_id, 'yarn_id': yarn_id, 'model_version': self.__version,
+                          'clean': ';'.join(clean), 'dropped': ';'.join(dropped)}
+                         for synset_id, (yarn_id, clean, dropped) in results.items()])
+        session.commit()
+
+    def invalidate(self, yarn_id: int) -> int:
+        """
+        удаляет сохраненные результаты (всех версий модели) для синсета, например, после его правки
+        :param yarn_id: id синсета в ярне (так синсеты называются на странице /contribute)
+        :return: количество удаленных строк
+        """
+        session = self.__alchemy.get_session()
+        deleted = session.query(CleanedSynset).filter(CleanedSynset.yarn_id == yarn_id) \
+            .delete(synchronize_session=False)
+        session.commit()
+        return deleted
+
+
+def synsets_in_range(alchemy: Alchemy, left: int, right: int) -> List[Tuple[int, int]]:
+    """
+    :return: id и yarn_id синсетов (у которых есть слова) из диапазона id, упорядоченные по id
+    """
+    return alchemy.get_session().query(Synset.id, Synset.yarn_id) \
+        .filter(and_(Synset.id >= left, Synset.id <= right)) \
+        .filter(Synset.id == SynsetWord.synset_id) \
+        .distinct() \
+        .order_by(Synset.id) \
+        .all()
+
+
+def precompute_cleaned_synsets(alchemy: Alchemy, model, batch_size: int = 500) -> int:
+    """
+    фоновое заполнение кэша: применяет модель ко всем синсетам базы, для которых еще нет результата этой версии
+    модели. Можно прервать и запустить снова - посчитанные синсеты не пересчитываются
+    :param alchemy: подключение к базе
+    :param model: модель
+    :param batch_size: сколько синсетов сохраняется за одну транзакцию
+    :return: количество посчитанных синсетов
+    """
+    cache = CleanedSynsetsCache(alchemy, model)
+    session = alchemy.get_session()
+    done = session.query(CleanedSynset.synset_id).filter(CleanedSynset.model_version == model.version())
+    synset_ids = [synset_id for synset_id, in session.query(Synset.id)
+                  .filter(Synset.id.in_(session.query(SynsetWord.synset_id)))
+                  .filter(Synset.id.notin_(done))
+                  .order_by(Synset.id)]
+    for start in tqdm.tqdm(range(0, len(synset_ids), batch_size)):
+        cache.compute(synset_ids[start:start + batch_size])
+    return len(synset_ids)
+
+
+if __name__ == '__main__':
+    from models.launcher import create_majority_row_model
+
+    print('Посчитано синсетов: {}'.format(
+        precompute_cleaned_synsets(Alchemy(sys.argv[1] if len(sys.argv) > 1 else 'data.db'),
+                                   create_majority_row_model())))
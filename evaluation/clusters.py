@@ -1 +1 @@
-import csvimport randomfrom db.data.manager import get_golden_csvfrom models.metrics import jacard_metricdef read_clusters(filename):    """    Считывает кластеры из csv файла в словарь. Каждому кластеру соответсвует словарь с сетом id синсетов,    из которых он состоит, и сет слов из этих синсетов    """    with open(filename) as csvfile:        reader = csv.DictReader(csvfile, delimiter=';', fieldnames=['index', 'synset_ids', 'words'])        clusters = {}        for row in reader:            index = int(row['index'])            clusters[index] = {}            clusters[index]['synset_ids'] = set(                [int(s_id) for s_id in row['synset_ids'].replace('s', '').split(',')])            clusters[index]['words'] = frozenset(row['words'].split(','))        return clustersdef find_most_similar_cluster(clusters, golden_cluster, similarity_function):    """    Находит самый похожий (по количеству совпавших id синсетов) кластер из ярна для кластера из голдена    :param clusters: словарь с кластерами ярна    :param golden_cluster: кластер голдена (словарь)    :param similarity_function: как сравнивать кластер ярна с кластером голдена    """    cluster_similarity = {i: similarity_function(clusters[i], golden_cluster) for i in clusters}    max_similarity = max(cluster_similarity.values())    return [s_id for s_id in cluster_similarity if cluster_similarity[s_id] == max_similarity]def get_golden_to_clusters_mapping(clusters_filename: str = '3to9.csv', golden_filename: str = 'new_golden.csv'):    """    для каждого кластера голдена находит наиболее похожий на него кластер ярна    :return: словарь, где ключ - id голдена, а значение - id наиболее похожего кластера ярна    """    yarn_clusters = read_clusters(clusters_filename)    golden = get_golden_csv(golden_filename)    golden_to_cluster = {}    for g_id in golden:        golden_cluster = golden[g_id]        # сначала сравниваем схожесть на основе совпавших id синсетов        id_similar_clusters = find_most_similar_cluster(yarn_clusters, golden_cluster,                    lambda yarn_clst, golden_clst:                    jacard_metric(None, None, golden_clst['synset_ids'], yarn_clst['synset_ids']))        if len(id_similar_clusters) > 1:            # сравниваем полученные кластеры по совпавшим словам с кластером голдена            word_similar_clusters = find_most_similar_cluster({i: yarn_clusters[i] for i in id_similar_clusters},                                                              golden_cluster,                    lambda yarn_clst, golden_clst:                    jacard_metric(None, None, golden_clst['words'], yarn_clst['words']))            if len(word_similar_clusters) > 1:  # снова несколько вариантов кластеров                # берем случайно выбранный кластер                golden_to_cluster[g_id] = random.choice(word_similar_clusters)            else:                golden_to_cluster[g_id] = word_similar_clusters[0]        else:            golden_to_cluster[g_id] = id_similar_clusters[0]    return golden_to_clusterif __name__ == '__main__':    mapping = get_golden_to_clusters_mapping()    with open('mapping.csv', 'w', newline='') as f:        fieldnames = ['golden_id', 'cluster_id']        csv_writer = csv.DictWriter(f, delimiter=';', fieldnames=fieldnames)        csv_writer.writeheader()        csv_writer.writerows([{fieldnames[0]: pair[0], fieldnames[1]: pair[1]} for pair in mapping.items()])
\ No newline at end of file
+import csvimport randomimport sysfrom collections import defaultdictfrom typing import Dict, Hashable, Iterable, List, Optionalimport numpy as npfrom scipy.sparse import csr_matrixfrom db.data.manager import get_golden_csvfrom models.metrics import jacard_metricdef read_clusters(filename):    """    Считывает кластеры из csv файла в словарь. Каждому кластеру соответсвует словарь с сетом id синсетов,    из которых он состоит, и сет слов из этих синсетов    """    with open(filename) as csvfile:        reader = csv.DictReader(csvfile, delimiter=';', fieldnames=['index', 'synset_ids', 'words'])        clusters = {}        for row in reader:            index = int(row['index'])            clusters[index] = {}            clusters[index]['synset_ids'] = set(                [int(s_id) for s_id in row['synset_ids'].replace('s', '').split(',')])            clusters[index]['words'] = frozenset(row['words'].split(','))        return clustersdef build_inverted_index(clusters, field: str) -> Dict[Hashable, List[int]]:    """    :param clusters: словарь с кластерами ярна    :param field: 'synset_ids' или 'words'    :return: словарь: id синсета (или слово) - порядковые номера кластеров (в clusters), в которых он есть    """    index = defaultdict(list)    for position, cluster in enumerate(clusters.values()):        for element in cluster[field]:            index[element].append(position)    return indexdef candidate_clusters(index: Dict[Hashable, List[int]], elements: Iterable[Hashable],                       cluster_ids: List[int]) -> List[int]:    """    :param index: результат build_inverted_index    :param cluster_ids: id кластеров в порядке clusters    :return: id кластеров, у которых есть хотя бы один общий с elements элемент, в порядке clusters    """    positions = {position for element in elements for position in index.get(element, [])}    return [cluster_ids[position] for position in sorted(positions)]def find_most_similar_cluster(clusters, golden_cluster, similarity_function, candidates: Optional[List[int]] = None):    """    Находит самый похожий (по количеству совпавших id синсетов) кластер из ярна для кластера из голдена    :param clusters: словарь с кластерами ярна    :param golden_cluster: кластер голдена (словарь)    :param similarity_function: как сравнивать кластер ярна с кластером голдена    :param candidates: id кластеров (в порядке clusters), схожесть с которыми может быть ненулевой (например,    candidate_clusters), схожесть остальных считается нулевой. Если среди кандидатов нет кластера с ненулевой    схожестью, возвращаются все кластеры    """    if candidates is not None:        cluster_similarity = {i: similarity_function(clusters[i], golden_cluster) for i in candidates}        max_similarity = max(cluster_similarity.values(), default=0)        if max_similarity == 0:            return list(clusters)        return [s_id for s_id in cluster_similarity if cluster_similarity[s_id] == max_similarity]    cluster_similarity = {i: similarity_function(clusters[i], golden_cluster) for i in clusters}    max_similarity = max(cluster_similarity.values())    return [s_id for s_id in cluster_similarity if cluster_similarity[s_id] == max_similarity]def incidence_matrix(items: List[Iterable[Hashable]], vocabulary: Dict[Hashable, int]) -> csr_matrix:    """    :param items: множества элементов    :param vocabulary: словарь элемент - номер столбца, пополняется новыми элементами    :return: разреженная матрица из нулей и единиц, [i, j] = 1, если j-й элемент есть в i-м множестве    """    indptr = [0]    indices = []    for item in items:        indices.extend(vocabulary.setdefault(element, len(vocabulary)) for element in item)        indptr.append(len(indices))    return csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(items), max(len(vocabulary), 1)))def jaccard_matrix(golden_items: List[Iterable[Hashable]], cluster_items: List[Iterable[Hashable]]) -> csr_matrix:    """    коэффициенты жаккара сразу для всех пар эталон - кластер: пересечения считаются одним произведением    разреженных матриц, поэтому хранятся и считаются только пары, у которых есть общие элементы    :return: разреженная матрица, [i, j] - коэффициент жаккара i-го эталона и j-го кластера    """    vocabulary = {}    golden = incidence_matrix(golden_items, vocabulary)    clusters = incidence_matrix(cluster_items, vocabulary)    golden.resize((golden.shape[0], clusters.shape[1]))    intersections = (golden @ clusters.T).tocoo()    golden_sizes = np.diff(golden.indptr)    cluster_sizes = np.diff(clusters.indptr)    unions = golden_sizes[intersections.row] + cluster_sizes[intersections.col] - intersections.data    return csr_matrix((intersections.data / unions, (intersections.row, intersections.col)),                      shape=intersections.shape)def most_similar_columns(row: csr_matrix, columns: Optional[np.ndarray] = None) -> Optional[np.ndarray]:    """    :param row: строка jaccard_matrix    :param columns: среди каких столбцов искать, по умолчанию - среди всех    :return: упорядоченные номера столбцов с наибольшей схожестью или None, если она нулевая    """    scores = dict(zip(row.indices, row.data))    if columns is not None:        scores = {column: scores[column] for column in columns if column in scores}    if not scores:        return None    max_similarity = max(scores.values())    return np.array(sorted(column for column, score in scores.items() if score == max_similarity))def golden_to_clusters_mapping(yarn_clusters, golden) -> Dict[str, int]:    """    то же, что get_golden_to_clusters_mapping, но схожести всех эталонов со всеми кластерами считаются сразу    (jaccard_matrix) сначала по id синсетов, потом по словам    :param yarn_clusters: словарь с кластерами ярна (read_clusters)    :param golden: словарь с кластерами голдена (get_golden_csv)    :return: словарь, где ключ - id голдена, а значение - id наиболее похожего кластера ярна    """    cluster_ids = list(yarn_clusters)    golden_ids = list(golden)    id_similarity = jaccard_matrix([golden[g_id]['synset_ids'] for g_id in golden_ids],                                   [yarn_clusters[c_id]['synset_ids'] for c_id in cluster_ids])    word_similarity = jaccard_matrix([golden[g_id]['words'] for g_id in golden_ids],                                     [yarn_clusters[c_id]['words'] for c_id in cluster_ids])    golden_to_cluster = {}    for row, g_id in enumerate(golden_ids):        # если ни с одним кластером нет общих синсетов (слов), одинаково похожи все кластеры        id_similar = most_similar_columns(id_similarity[row])        if id_similar is None:            id_similar = np.arange(len(cluster_ids))        if len(id_similar) > 1:            word_similar = most_similar_columns(word_similarity[row], id_similar)            if word_similar is None:                word_similar = id_similar            if len(word_similar) > 1:  # снова несколько вариантов кластеров                # берем случайно выбранный кластер                golden_to_cluster[g_id] = random.choice([cluster_ids[c] for c in word_similar])            else:                golden_to_cluster[g_id] = cluster_ids[word_similar[0]]        else:            golden_to_cluster[g_id] = cluster_ids[id_similar[0]]    return golden_to_clusterdef get_golden_to_clusters_mapping(clusters_filename: str = '3to9.csv', golden_filename: str = 'new_golden.csv',                                   vectorized: bool = True):    """    для каждого кластера голдена находит наиболее похожий на него кластер ярна    :param vectorized: считать схожести всех эталонов сразу (golden_to_clusters_mapping), иначе - для каждого    эталона отдельно, но только с кластерами, у которых есть общие с ним синсеты (слова)    :return: словарь, где ключ - id голдена, а значение - id наиболее похожего кластера ярна    """    yarn_clusters = read_clusters(clusters_filename)    golden = get_golden_csv(golden_filename)    if vectorized:        return golden_to_clusters_mapping(yarn_clusters, golden)    cluster_ids = list(yarn_clusters)    synsets_index = build_inverted_index(yarn_clusters, 'synset_ids')    words_index = build_inverted_index(yarn_clusters, 'words')    golden_to_cluster = {}    for g_id in golden:        golden_cluster = golden[g_id]        # сначала сравниваем схожесть на основе совпавших id синсетов        id_similar_clusters = find_most_similar_cluster(yarn_clusters, golden_cluster,                    lambda yarn_clst, golden_clst:                    jacard_metric(None, None, golden_clst['synset_ids'], yarn_clst['synset_ids']),                    candidate_clusters(synsets_index, golden_cluster['synset_ids'], cluster_ids))        if len(id_similar_clusters) > 1:            # сравниваем полученные кластеры по совпавшим словам с кластером голдена            id_similar = {i: yarn_clusters[i] for i in id_similar_clusters}            word_similar_clusters = find_most_similar_cluster(id_similar, golden_cluster,                    lambda yarn_clst, golden_clst:                    jacard_metric(None, None, golden_clst['words'], yarn_clst['words']),                    [i for i in candidate_clusters(words_index, golden_cluster['words'], cluster_ids)                     if i in id_similar])            if len(word_similar_clusters) > 1:  # снова несколько вариантов кластеров                # берем случайно выбранный кластер                golden_to_cluster[g_id] = random.choice(word_similar_clusters)            else:                golden_to_cluster[g_id] = word_similar_clusters[0]        else:            golden_to_cluster[g_id] = id_similar_clusters[0]    return golden_to_clusterif __name__ == '__main__':    # python clusters.py [3to9.csv] [mapping.csv]    mapping = get_golden_to_clusters_mapping(*sys.argv[1:2])    with open(sys.argv[2] if len(sys.argv) > 2 else 'mapping.csv', 'w', newline='') as f:        fieldnames = ['golden_id', 'cluster_id']        csv_writer = csv.DictWriter(f, delimiter=';', fieldnames=fieldnames)        csv_writer.writeheader()        csv_writer.writerows([{fieldnames[0]: pair[0], fieldnames[1]: pair[1]} for pair in mapping.items()])
\ No newline at end of file
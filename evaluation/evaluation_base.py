@@ -1,4 +1,4 @@
-import numpy as np
+from evaluation.metrics import pairs_scores
 
 def get_JPRF(ideal, version):
     '''
@@ -23,13 +23,7 @@ def evaluate(results):
     Принимает коллекцию пар "золотой синсет" - автоматически созданный синсет.
     Возвращает средние Jaccard, precision, recall, F-score для этой коллекции
     '''
-    grades = []
-    for ideal, version in results:
-        scores = get_JPRF(ideal, version)
-        #print(scores)
-        grades.append(scores)
-    grades = np.array(grades)
-    return grades.mean(axis=0)
+    return pairs_scores(results).mean(axis=0)
 
 # Просто игрушечный пример
 results = (({1, 2, 3}, {2, 3}), ({4, 5}, {4, 5, 6, 7}))
@@ -0,0 +1,135 @@
+import ast
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from db.data.manager import get_golden_csv
+
+METRICS = ['jaccard', 'precision', 'recall', 'f_score']
+# сколько строк выборок бутстрепа (выборка х синсеты) считается за раз
+BOOTSTRAP_CHUNK = 1000000
+
+
+def synsets_frame(synsets: Dict[str, Iterable[str]]) -> pd.DataFrame:
+    """
+    :param synsets: словарь id голдена - слова синсета
+    :return: синсеты в длинном формате: строка на каждое слово, столбцы golden_id и word
+    """
+    frame = pd.DataFrame([(golden_id, word) for golden_id, words in synsets.items() for word in words],
+                         columns=['golden_id', 'word'])
+    return frame.drop_duplicates(ignore_index=True)
+
+
+def read_golden(filename: str = 'new_golden.csv') -> pd.DataFrame:
+    """
+    :return: синсеты голдена (get_golden_csv) в длинном формате
+    """
+    return synsets_frame({golden_id: synset['words'] for golden_id, synset in get_golden_csv(filename).items()})
+
+
+def write_submission(path: str, synsets: Dict[str, Iterable[str]]):
+    """
+    сохраняет синсеты модели в длинном формате: строка на каждое слово, столбцы golden_id и word
+    """
+    synsets_frame(synsets).to_csv(path, index=False)
+
+
+def read_submission(path: str) -> pd.DataFrame:
+    """
+    :param path: csv в длинном формате (write_submission) или старый, где в столбце best записан лист слов
+    :return: синсеты модели в длинном формате
+    """
+    frame = pd.read_csv(path, encoding='utf-8', keep_default_na=False)
+    if 'word' in frame.columns:
+        return frame[['golden_id', 'word']].drop_duplicates(ignore_index=True)
+    return synsets_frame(dict(zip(frame.golden_id, frame.best.map(ast.literal_eval))))
+
+
+def incidence_matrices(golden: pd.DataFrame, submission: pd.DataFrame) -> Tuple[List[str], csr_matrix, csr_matrix]:
+    """
+    кодирует синсеты голдена и модели разреженными матрицами с общим словарем: строка - id голдена из submission
+    (в порядке submission), столбец - слово, [i, j] = 1, если слово есть в синсете
+    :return: id голдена, матрица голдена, матрица модели
+    """
+    golden_ids = pd.Index(pd.unique(submission.golden_id))
+    golden = golden[golden.golden_id.isin(golden_ids)]
+    missing = golden_ids.difference(pd.unique(golden.golden_id))
+    if len(missing):
+        raise KeyError('нет в голдене: {}'.format(', '.join(map(str, missing))))
+    words = pd.Index(pd.unique(pd.concat([golden.word, submission.word])))
+
+    def encode(frame):
+        rows = golden_ids.get_indexer(frame.golden_id)
+        columns = words.get_indexer(frame.word)
+        return csr_matrix((np.ones(len(frame)), (rows, columns)), shape=(len(golden_ids), len(words)))
+
+    return list(golden_ids), encode(golden), encode(submission)
+
+
+def jprf_scores(golden: pd.DataFrame, submission: pd.DataFrame) -> pd.DataFrame:
+    """
+    то же, что evaluate.get_JPRF для каждой пары эталон - синсет модели, но для всех пар сразу
+    :param golden: синсеты голдена в длинном формате (read_golden)
+    :param submission: синсеты модели в длинном формате (read_submission)
+    :return: Jaccard, precision, recall, F-score для каждого id голдена из submission
+    """
+    golden_ids, ideal, version = incidence_matrices(golden, submission)
+    n_ij = np.asarray(ideal.multiply(version).sum(axis=1)).ravel()  # Кол-во элементов и в кластере, и в классе
+    n_i = np.asarray(version.sum(axis=1)).ravel()  # Кол-во элементов в кластере
+    n_j = np.asarray(ideal.sum(axis=1)).ravel()  # Кол-во элементов в классе
+    if not (n_i.all() and n_j.all()):
+        raise ZeroDivisionError('пустой синсет')
+    P = n_ij / n_i
+    R = n_ij / n_j
+    J = n_ij / (n_i + n_j - n_ij)
+    with np.errstate(invalid='ignore'):
+        F1 = np.where(P + R > 0, (2 * P * R) / (P + R), 0)  # 0, если вообще нет правильно выбранных элементов
+    return pd.DataFrame({'jaccard': J, 'precision': P, 'recall': R, 'f_score': F1},
+                        index=pd.Index(golden_ids, name='golden_id'), columns=METRICS)
+
+
+def pairs_scores(results: Iterable[Tuple[Iterable, Iterable]]) -> np.ndarray:
+    """
+    :param results: коллекция пар "золотой синсет" - автоматически созданный синсет
+    :return: массив (количество пар х 4) с Jaccard, precision, recall, F-score для каждой пары
+    """
+    results = list(results)
+    if not all(ideal and version for ideal, version in results):
+        raise ZeroDivisionError('пустой синсет')
+    golden = synsets_frame({i: ideal for i, (ideal, _) in enumerate(results)})
+    submission = synsets_frame({i: version for i, (_, version) in enumerate(results)})
+    return jprf_scores(golden, submission).loc[range(len(results))].values
+
+
+def bootstrap_intervals(scores: pd.DataFrame, iterations: int = 10000, confidence: float = 0.95,
+                        seed: int = 0) -> pd.DataFrame:
+    """
+    доверительные интервалы средних метрик по бутстрепу: синсеты выбираются с возвращением iterations раз
+    :param scores: результат jprf_scores
+    :param confidence: уровень доверия
+    :return: для каждой метрики среднее и границы интервала (low, high)
+    """
+    values = scores.values
+    generator = np.random.default_rng(seed)
+    chunk = max(BOOTSTRAP_CHUNK // max(len(values), 1), 1)
+    means = []
+    for start in range(0, iterations, chunk):
+        samples = generator.integers(0, len(values), size=(min(chunk, iterations - start), len(values)))
+        means.append(values[samples].mean(axis=1))
+    low, high = np.percentile(np.concatenate(means), [(1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100],
+                              axis=0)
+    return pd.DataFrame({'mean': values.mean(axis=0), 'low': low, 'high': high}, index=scores.columns)
+
+
+def print_scores(scores: pd.DataFrame, iterations: int = 10000, confidence: float = 0.95):
+    intervals = bootstrap_intervals(scores, iterations, confidence)
+    for metric, row in intervals.iterrows():
+        print('Mean {} {} ({:.0%} CI {:.4f} - {:.4f})'.format(metric, row['mean'], confidence, row.low, row.high))
+
+
+if __name__ == '__main__':
+    # python -m evaluation.metrics submission.csv [new_golden.csv]
+    print_scores(jprf_scores(read_golden(*sys.argv[2:3]), read_submission(sys.argv[1])))
@@ -0,0 +1,90 @@
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+
+import numpy as np
+import tqdm
+
+from models.layer_model.additional import Word2VecOrdering
+from models.layer_model.model import LayerModel, NewSynset
+from models.metrics import jaccard_similarity
+from models.word_to_word.model import WordToWord
+
+# пороги, которые перебираются в скриптах подбора параметров
+THRESHOLDS = [x / 100 for x in range(25, 100, 5)]
+
+# эталонный синсет и все, что нужно модели для его восстановления, собранное один раз до перебора порогов
+SweepItem = namedtuple('SweepItem', 'ideal words definitions')
+
+
+def gather_layer_items(alchemy, ideals: List[FrozenSet[str]], words: List[Iterable[str]]) -> List[SweepItem]:
+    """
+    упорядочивает слова (Word2VecOrdering) и получает их определения из базы один раз для всех эталонов
+    :param alchemy: подключение к базе
+    :param ideals: эталонные синсеты
+    :param words: слова, из которых модель выделяет синсеты, для каждого эталона
+    :return: данные для sweep_layer_model
+    """
+    ordered = Word2VecOrdering.order_words_sequences_using_average_sim([list(w) for w in words])
+    definitions = alchemy.get_synsets_words_definitions(ordered)
+    return [SweepItem(ideal, ordered_words, synset_definitions)
+            for ideal, ordered_words, synset_definitions in zip(ideals, ordered, definitions)]
+
+
+def gather_word_items(ideals: List[FrozenSet[str]], words: List[Iterable[str]]) -> List[SweepItem]:
+    """
+    :return: данные для sweep_word_to_word. Слова передаются модели тем же объектом, что и раньше, чтобы порядок
+    перебора множеств внутри WordToWord не изменился
+    """
+    return [SweepItem(ideal, item_words, None) for ideal, item_words in zip(ideals, words)]
+
+
+def best_jaccard(ideal: FrozenSet[str], synsets: List[List[str]]) -> float:
+    """
+    :return: наибольший коэффициент жаккара между эталоном и выделенными синсетами
+    """
+    return max(jaccard_similarity(ideal, set(synset)) for synset in synsets)
+
+
+def sweep_layer_model(model: LayerModel, items: List[SweepItem], thresholds: List[float] = THRESHOLDS,
+                      synsets_filter: Optional[Callable[[NewSynset], bool]] = None) -> Dict[float, List[float]]:
+    """
+    применяет LayerModel к каждому эталону со всеми порогами fasttext. Схожести определений и слов синсета
+    считаются один раз на эталон, а не на каждый порог
+    :param model: модель
+    :param items: результат gather_layer_items
+    :param thresholds: пороги
+    :param synsets_filter: какие выделенные синсеты учитывать, по умолчанию - все
+    :return: для каждого порога лист оценок best_jaccard по эталонам
+    """
+    scores = OrderedDict((threshold, []) for threshold in thresholds)
+    for item in tqdm.tqdm(items):
+        model.precompute_similarities(item.definitions)
+        for threshold in thresholds:
+            model.set_fasttext_threshold(threshold)
+            synsets = [s.words for s in model.extract_new_synsets(item.definitions)
+                       if synsets_filter is None or synsets_filter(s)]
+            scores[threshold].append(best_jaccard(item.ideal, synsets))
+    model.clear_precomputed_similarities()
+    return scores
+
+
+def sweep_word_to_word(model: WordToWord, items: List[SweepItem],
+                       thresholds: List[float] = THRESHOLDS) -> Dict[float, List[float]]:
+    """
+    применяет WordToWord к каждому эталону со всеми порогами, матрица схожести слов считается один раз на эталон
+    :param model: модель
+    :param items: результат gather_word_items
+    :param thresholds: пороги
+    :return: для каждого порога лист оценок best_jaccard по эталонам
+    """
+    scores = OrderedDict((threshold, []) for threshold in thresholds)
+    for item in tqdm.tqdm(items):
+        similarity = model.word_similarity_matrix(list(item.words))
+        for threshold in thresholds:
+            model.set_threshold(threshold)
+            scores[threshold].append(best_jaccard(item.ideal, model.extract_clusters(item.words, similarity)))
+    return scores
+
+
+def mean_scores(scores: Dict[float, List[float]]) -> Dict[float, float]:
+    return OrderedDict((threshold, np.mean(values)) for threshold, values in scores.items())
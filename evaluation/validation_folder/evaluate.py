@@ -1,4 +1,4 @@
-import numpy as np
+from evaluation.metrics import pairs_scores
 
 
 def get_mapping_and_clusters():
@@ -57,12 +57,7 @@ def evaluate(results):
     Принимает коллекцию пар "золотой синсет" - автоматически созданный синсет.
     Возвращает средние Jaccard, precision, recall, F-score для этой коллекции
     '''
-    grades = []
-    for ideal, version in results:
-        scores = get_JPRF(ideal, version)
-        grades.append(scores)
-    grades = np.array(grades)
-    return grades.mean(axis=0)
+    return pairs_scores(results).mean(axis=0)
 
 
 def get_version(file_name):
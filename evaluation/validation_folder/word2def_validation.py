@@ -2,12 +2,12 @@ import tqdm
 
 from db.data.manager import get_golden_csv, get_mapping, load_alchemy
 from evaluation.clusters import read_clusters
+from evaluation.metrics import write_submission
 from models.metrics import jaccard_similarity
 from models.layer_model.model import LayerModel
 from models.layer_model.additional import Word2VecOrdering
 
 import numpy as np
-import pandas as pd
 
 if __name__ == '__main__':
     alchemy = load_alchemy('data.db')
@@ -42,4 +42,4 @@ if __name__ == '__main__':
 
     print(np.mean(scores))
 
-    pd.DataFrame({'golden_id': golden_ids, 'best': extracted_synsets}).to_csv('word2defs_average_submission.csv')
+    write_submission('word2defs_average_submission.csv', dict(zip(golden_ids, extracted_synsets)))
@@ -2,11 +2,11 @@ import tqdm
 
 from db.data.manager import get_golden_csv, get_mapping
 from evaluation.clusters import read_clusters
+from evaluation.metrics import write_submission
 from models.metrics import jaccard_similarity
 from models.word_to_word.model import WordToWord
 
 import numpy as np
-import pandas as pd
 
 if __name__ == '__main__':
     model = WordToWord(threshold=0.45)  # лучший порог с валидации
@@ -34,4 +34,4 @@ if __name__ == '__main__':
 
     print(np.mean(scores))
 
-    pd.DataFrame({'golden_id': golden_ids, 'best': extracted_synsets}).to_csv('word2word_submission.csv')
+    write_submission('word2word_submission.csv', dict(zip(golden_ids, extracted_synsets)))
@@ -10,9 +10,21 @@ import pandas as pd
 from db.alchemy import Alchemy
 from models.metrics import general_metric, jacard_with_word_influence
 from models.processing import remove_stop_words_tokens
+from models.similarity import DefinitionSimilarity
 from models.utils import results_as_dict
 
 
+def _describe(function) -> str:
+    """
+    :return: описание функции или partial без адресов в памяти
+    """
+    if isinstance(function, partial):
+        arguments = [_describe(a) for a in function.args]
+        arguments.extend('{}={}'.format(k, _describe(v)) for k, v in sorted(function.keywords.items()))
+        return '{}({})'.format(_describe(function.func), ', '.join(arguments))
+    return getattr(function, '__name__', repr(function))
+
+
 class Model(metaclass=abc.ABCMeta):
     def __init__(self, threshold: float, metric):
         """
@@ -22,23 +34,28 @@ class Model(metaclass=abc.ABCMeta):
         """
         self._threshold = threshold
         self._metric = metric
+        # если метрика - жаккар по определениям, то матрица схожести считается сразу для всех пар
+        self._similarity = DefinitionSimilarity.from_metric(metric)
+
+    def version(self) -> str:
+        """
+        :return: строка, однозначно описывающая модель (класс, порог, метрика). По ней различаются
+        сохраненные результаты разных моделей
+        """
+        return '{}(threshold={}, metric={})'.format(type(self).__name__, self._threshold, _describe(self._metric))
 
-    def  _create_similarity_matrix(self, objects: List[Any], metric):
+    def _create_similarity_matrix(self, objects: List[Any], metric):
         """
         :param objects: список объектов для сравнения
-        :param metric: функция, вычисляющая схожесть двух объектов и возвращающая число в [0, 1]
+        :param metric: симметричная функция, вычисляющая схожесть двух объектов и возвращающая число в [0, 1]
         :return: матрица, где [i, j] - похожесть i-го объекта на j-й
         """
         length = len(objects)
         matrix = np.zeros((length, length))
-        viewed_elements = np.zeros((length, length), dtype=bool)
 
         for i in range(length):
-            for j in range(length):
-                if i == j or viewed_elements[i, j]:
-                    continue
+            for j in range(i + 1, length):
                 matrix[i, j] = matrix[j, i] = metric(objects[i], objects[j])
-                viewed_elements[i, j], viewed_elements[i, j] = True, True
 
         return matrix
 
@@ -52,6 +69,8 @@ class Model(metaclass=abc.ABCMeta):
         if multiple_meaning_strategy != 'closest':
             pass
         else:
+            if self._similarity:
+                return self._similarity.words_matrix(pair)
             scorer = self.strict_similarity
         return self._create_similarity_matrix(pair, scorer)
 
@@ -61,6 +80,8 @@ class Model(metaclass=abc.ABCMeta):
         :param second: как и first
         :return: возвращает самую большую схожесть между определениями по метрике из first и second
         """
+        if self._similarity:
+            return self._similarity.strict_similarity(first, second)
         w1, ds1 = first
         w2, ds2 = second
         return max(map(lambda x: self._metric(w1, w2, x[0], x[1]), itertools.product(ds1, ds2)))
@@ -0,0 +1,99 @@
+import os
+from typing import Iterable
+
+import numpy as np
+import tqdm
+
+from db.alchemy import Alchemy
+from db.base import Definition
+
+IDS_FILE = 'ids.npy'
+VECTORS_FILE = 'vectors.npy'
+
+
+class DefinitionVectors:
+    """
+    Хранилище заранее посчитанных векторов определений из таблицы definition. Векторы нормированы (float32),
+    строки упорядочены по Definition.id и читаются с диска через memory map. Нулевая строка означает, что
+    модель не смогла построить вектор для определения
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: каталог, созданный build_definition_vectors
+        """
+        self.__ids = np.load(os.path.join(path, IDS_FILE), mmap_mode='r')
+        self.__vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def __contains__(self, def_id) -> bool:
+        if def_id is None or not len(self.__ids):
+            return False
+        idx = np.searchsorted(self.__ids, def_id)
+        return idx < len(self.__ids) and self.__ids[idx] == def_id
+
+    def rows(self, def_ids: Iterable[int]) -> np.ndarray:
+        """
+        :param def_ids: id определений
+        :return: номера строк матрицы векторов для этих определений
+        """
+        def_ids = np.fromiter(def_ids, dtype=np.int64)
+        rows = np.searchsorted(self.__ids, def_ids)
+        if len(def_ids) and (rows.max() >= len(self.__ids) or not np.array_equal(self.__ids[rows], def_ids)):
+            raise KeyError('Для некоторых определений нет векторов')
+        return rows
+
+    def vectors(self, def_ids: Iterable[int]) -> np.ndarray:
+        """
+        :param def_ids: id определений
+        :return: матрица нормированных векторов определений
+        """
+        return self.__vectors[self.rows(def_ids)]
+
+
+def build_definition_vectors(alchemy: Alchemy, model, path: str, batch_size: int = 10000) -> int:
+    """
+    один раз строит векторы для всех определений из базы и сохраняет их в каталог path
+    :param alchemy: подключение к базе
+    :param model: модель, которая по строке определения возвращает вектор (интерфейс gensim)
+    :param path: каталог для хранилища
+    :param batch_size: сколько определений читается из базы за раз
+    :return: количество определений, для которых не удалось построить вектор
+    """
+    os.makedirs(path, exist_ok=True)
+    query = alchemy.get_session().query(Definition.id, Definition.definition).order_by(Definition.id)
+    ids = np.array([def_id for def_id, in alchemy.get_session().query(Definition.id).order_by(Definition.id)],
+                   dtype=np.int64)
+    np.save(os.path.join(path, IDS_FILE), ids)
+
+    vectors = None
+    unknown = 0
+    for row, (def_id, definition) in enumerate(tqdm.tqdm(query.yield_per(batch_size), total=len(ids))):
+        try:
+            vector = np.asarray(model[definition], dtype=np.float32)
+        except KeyError:
+            unknown += 1
+            continue
+        if vectors is None:
+            vectors = np.lib.format.open_memmap(os.path.join(path, VECTORS_FILE), mode='w+',
+                                                dtype=np.float32, shape=(len(ids), len(vector)))
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vectors[row] = vector / norm
+    if vectors is None:
+        np.save(os.path.join(path, VECTORS_FILE), np.zeros((len(ids), 0), dtype=np.float32))
+    else:
+        vectors.flush()
+    return unknown
+
+
+if __name__ == '__main__':
+    from db.data.manager import load_alchemy, load_fasttext_bin
+
+    store_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'db', 'data', 'definition_vectors')
+    failed = build_definition_vectors(load_alchemy('data.db'),
+                                      load_fasttext_bin('fasttext_model/araneum_none_fasttextcbow_300_5_2018.model'),
+                                      store_path)
+    print('Не удалось построить векторы для {} определений'.format(failed))
@@ -3,6 +3,7 @@ from typing import List
 import numpy as np
 
 from db.data.manager import load_word2vec_bin
+from models.similarity import normalize_rows
 
 
 class Word2VecOrdering:
@@ -18,28 +19,54 @@ class Word2VecOrdering:
         :param words: массив слов
         :return: массив слов, упорядоченный в соответствии со схемой
         """
-        words = np.array(words)
+        return Word2VecOrdering.order_words_sequences_using_average_sim([words])[0]
 
+    @staticmethod
+    def order_words_sequences_using_average_sim(sequences: List[List[str]]) -> List[List[str]]:
+        """
+        То же, что order_words_sequence_using_average_sim, но сразу для многих последовательностей (синсетов):
+        вектор каждого слова извлекается из модели один раз, матрица схожести каждой последовательности
+        получается одним матричным произведением нормированных векторов
+        :param sequences: лист массивов слов
+        :return: лист упорядоченных массивов слов
+        """
         if not Word2VecOrdering.loaded_model:
             Word2VecOrdering.set_up()
-        matrix = np.array([[Word2VecOrdering.loaded_model.similarity(x, y)
-                            if x in Word2VecOrdering.loaded_model and y in Word2VecOrdering.loaded_model and x != y else 0
-                            for y in words]
-                           for x in words])
+        model = Word2VecOrdering.loaded_model
+
+        known = [w for w in dict.fromkeys(w for words in sequences for w in words) if w in model]
+        index = {w: i for i, w in enumerate(known)}
+        vectors = normalize_rows(np.array([model[w] for w in known], dtype=np.float32)) if known else None
+
+        result = []
+        for words in sequences:
+            words = np.array(words)
+            rows = np.array([index.get(w, -1) for w in words], dtype=int)
+            is_known = rows >= 0
+            # схожесть слова с самим собой и с незнакомыми модели словами считается нулевой
+            matrix = np.zeros((len(words), len(words)))
+            if is_known.any():
+                known_vectors = vectors[rows[is_known]]
+                matrix[np.ix_(is_known, is_known)] = known_vectors @ known_vectors.T
+            matrix[words[:, None] == words[None, :]] = 0
 
-        mean_scores = matrix.mean(axis=1)
-        sorted_indexes = np.flip(np.argsort(mean_scores), axis=0)
-        return list(words[sorted_indexes])
+            mean_scores = matrix.mean(axis=1)
+            sorted_indexes = np.flip(np.argsort(mean_scores), axis=0)
+            result.append(list(words[sorted_indexes]))
+        return result
 
     @staticmethod
-    def set_up(new_model_path: str = None):
+    def set_up(new_model_path: str = None, pretrained_model=None):
         """
         инициализурет статический класс и, статическую переменную loaded_model некоторой предобученной моделью,
         которая лежит в каталоге db/data или же инициализирует модель по умолчанию
         :param new_model_path: имя модели
+        :param pretrained_model: уже загруженная модель, тогда new_model_path не используется
         :return: None
         """
-        if new_model_path:
+        if pretrained_model is not None:
+            Word2VecOrdering.loaded_model = pretrained_model
+        elif new_model_path:
             Word2VecOrdering.loaded_model = load_word2vec_bin(new_model_path)
         else:
             # надо использовать эту модель для word2vec
@@ -2,22 +2,36 @@ from typing import Iterable
 
 
 class Definition:
-    def __init__(self, def_id: int, word: str, definition: str):
-        self.word = word
-        self.definition = definition
-        self.alternatives = []
-        self.is_linked = None
-        self.id = def_id
+    """
+    Неизменяемая запись об определении слова. Состояние обработки (например, объединено ли определение с другими)
+    в ней не хранится, поэтому одни и те же объекты можно кэшировать и использовать в разных запросах и потоках
+    """
+    __slots__ = ('id', 'word', 'definition', 'alternatives')
 
-    def add_alternative_definition(self, alternative: str):
-        self.alternatives.append(alternative)
+    def __init__(self, def_id: int, word: str, definition: str, alternatives: Iterable[str] = ()):
+        object.__setattr__(self, 'word', word)
+        object.__setattr__(self, 'definition', definition)
+        object.__setattr__(self, 'alternatives', tuple(alternatives))
+        object.__setattr__(self, 'id', def_id)
 
-    def add_alternative_definitions(self, alternatives: Iterable[str]):
-        self.alternatives.extend(alternatives)
+    def __setattr__(self, name, value):
+        raise AttributeError('Definition нельзя изменить')
+
+    def __delattr__(self, name):
+        raise AttributeError('Definition нельзя изменить')
+
+    def __reduce__(self):
+        return Definition, (self.id, self.word, self.definition, self.alternatives)
+
+    def with_alternative_definitions(self, alternatives: Iterable[str]) -> 'Definition':
+        """
+        :return: новое определение, к альтернативам которого добавлены alternatives
+        """
+        return Definition(self.id, self.word, self.definition, self.alternatives + tuple(alternatives))
 
     def __str__(self):
         return 'Id: {}, word: {}, definition: {}, alternatives: {}'.format(self.id, self.word, self.definition,
-                                                                           self.alternatives)
+                                                                           list(self.alternatives))
 
     def __repr__(self):
-        return str(self)
\ No newline at end of file
+        return str(self)
@@ -29,6 +29,9 @@ class Layer:
         self.word = word
         # self.original_word = word
         self.definitions = definitions if definitions else []
+        # какие определения уровня уже объединены с определениями других уровней. Уровни создаются заново
+        # при каждом вызове extract_new_synsets, поэтому сами определения не изменяются
+        self.linked = [False] * len(self.definitions)
         self.next_layer = None
 
     # def _normalize_word(self):
@@ -45,21 +48,24 @@ class Layer:
     #                 self.word = parsed.normal_form
 
     def all_definitions_are_linked(self) -> bool:
-        for d in self.definitions:
-            if not d.is_linked:
-                return False
-        return True
+        return all(self.linked)
 
     def get_first_free_definition(self) -> Definition:
-        for d in self.definitions:
-            if not d.is_linked:
-                d.is_linked = True
+        for i, d in enumerate(self.definitions):
+            if not self.linked[i]:
+                self.linked[i] = True
                 return d
 
-    def free_definitions_generator(self) -> Iterable[Definition]:
-        for d in self.definitions:
-            if not d.is_linked:
-                yield d
+    def free_definitions_generator(self) -> Iterable[Tuple[int, Definition]]:
+        """
+        :return: номера и сами определения, которые еще не объединены
+        """
+        for i, d in enumerate(self.definitions):
+            if not self.linked[i]:
+                yield i, d
+
+    def link(self, index: int):
+        self.linked[index] = True
 
     def __eq__(self, other):
         return self.__class__ == other.__class__ and self.word == other.word
@@ -75,9 +81,12 @@ class Layer:
 
 
 class LayerModel(Model):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, pretrained_model=None, **kwargs):
+        """
+        :param pretrained_model: модель векторов для FastTextWrapper, по умолчанию - fasttext из db/data
+        """
         super().__init__(*args, **kwargs)
-        self._fasttext = FastTextWrapper()
+        self._fasttext = FastTextWrapper(pretrained_model=pretrained_model)
 
     def set_fasttext_definition_strategy(self, new_strategy):
         self._fasttext.set_new_strategy(new_strategy)
@@ -85,6 +94,21 @@ class LayerModel(Model):
     def set_fasttext_threshold(self, new_threshold):
         self._fasttext.set_new_threshold(new_threshold)
 
+    def set_fasttext_definition_vectors(self, definition_vectors):
+        self._fasttext.set_definition_vectors(definition_vectors)
+
+    def precompute_similarities(self, synset_definition: Dict[str, List[Definition]]):
+        """
+        один раз считает схожести определений и слов синсета, чтобы затем быстро применить модель к этому синсету
+        с разными порогами (set_fasttext_threshold). Действует до вызова clear_precomputed_similarities
+        :param synset_definition: слова синсета с определениями
+        """
+        definitions = [d for ds in synset_definition.values() if ds for d in ds]
+        return self._fasttext.precompute(definitions, synset_definition.keys())
+
+    def clear_precomputed_similarities(self):
+        self._fasttext.set_precomputed(None)
+
     def definitions_similarity(self, first: Definition, second: Definition) -> float:
         return self._metric(w1='', d1=first.definition, w2='', d2=second.definition)
 
@@ -112,7 +136,8 @@ class LayerModel(Model):
     #                        (definitions[i] for i in np.setdiff1d(np.arange(len(definitions)), similar_indices))]
     #     if similar_indices.any():
     #         combined_definition = Definition(word, definitions[similar_indices[0]])
-    #         combined_definition.add_alternative_definitions(definitions[i] for i in similar_indices[1:])
+    #         combined_definition = combined_definition.with_alternative_definitions(
+    #             definitions[i] for i in similar_indices[1:])
     #         unique_meanings.append(combined_definition)
     #     return unique_meanings
 
@@ -141,9 +166,9 @@ class LayerModel(Model):
         """
         if next_layer.all_definitions_are_linked():
             return None
-        for d in next_layer.free_definitions_generator():
+        for i, d in next_layer.free_definitions_generator():
             if self._is_definition_in_chain(d, linked_definition):
-                d.is_linked = True
+                next_layer.link(i)
                 return d
         return None
 
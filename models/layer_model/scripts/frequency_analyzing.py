@@ -1,67 +1,138 @@
 import json
+import multiprocessing
 import tqdm
 import os
-from typing import List
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-from db.base import Word, WordDefinitionRelation, Definition
+from sqlalchemy import func
+
+from db.base import Word, WordDefinitionRelation, Definition, SynsetWord
 from db.data.manager import load_alchemy, read_pandas, get_golden, load_json_file
+from db.repair import REPAIRS, run_repair
 
 
-def add_absent_words_from_dictionary(absent_words: List[str], dict_path: str):
+DICTIONARIES = ['mas', 'ushakov', 'bts', 'ruTes', 'ozhshv', 'babenko', 'yarn', 'efremova']
+
+# статьи словаря для недостающих слов: слово - (часть речи первой статьи, определения из всех статей)
+DictionaryIndex = Dict[str, Tuple[str, List[str]]]
+
+
+def index_dictionary(dict_path: str, words: Set[str]) -> Tuple[DictionaryIndex, int]:
     """
-    Добавляет слова из absent_words в базу
-    :param absent_words: список недостающих слов
-    :param dict_path: путь до словаря
-    :return:
+    за один проход по словарю собирает статьи для слов из words
+    :param dict_path: путь до словаря в формате jsonl
+    :param words: слова, которые нужно найти
+    :return: найденные статьи и общее количество статей в словаре
     """
-    a = load_alchemy('data.db')
-    session = a.get_session()
-    session_counter = 0
-    absent_words = set(absent_words)
-    added_word_id = {}
-    with open(dict_path) as f:
-        for line in tqdm.tqdm(f):
-            if session_counter == 100:
-                session.commit()
-                session_counter = 0
+    index = {}
+    entries = 0
+    with open(dict_path, encoding='utf-8') as f:
+        for line in f:
+            entries += 1
             dict_entry = json.loads(line)
             if 'definition' in dict_entry and dict_entry['word']:
                 word_entry = dict_entry['word'][0]
-                if word_entry in absent_words:
-                    definitions = [Definition(d) for d in dict_entry['definition']]
-                    if word_entry not in added_word_id:
-                        word = Word(word_entry, dict_entry['POS'])
-                        session.add(word)
-                        session.flush()
-                        word_id = word.id
-                        added_word_id[word_entry] = word.id
-                    else:
-                        word_id = added_word_id[word_entry]
-                    for d in definitions:
-                        session.add(d)
-                        session.flush()
-                        session.add(WordDefinitionRelation(word_id, d.id))
-                    session_counter += 1
+                if word_entry in words:
+                    index.setdefault(word_entry, (dict_entry['POS'], []))[1].extend(dict_entry['definition'])
+    return index, entries
+
+
+def _index_dictionary_task(task: Tuple[str, Set[str]]) -> Tuple[DictionaryIndex, int]:
+    return index_dictionary(*task)
+
+
+def find_absent_synset_words(alchemy) -> List[str]:
+    """
+    :return: слова синсетов, которых нет в таблице word
+    """
+    session = alchemy.get_session()
+    rows = session.query(SynsetWord.word).filter(SynsetWord.word.notin_(session.query(Word.word))).distinct()
+    return sorted(word for word, in rows)
+
+
+def merge_dictionaries(alchemy, absent_words: Iterable[str], dict_paths: 'OrderedDict[str, str]',
+                       workers: int = None) -> Dict[str, Dict[str, int]]:
+    """
+    добавляет в базу недостающие слова сразу из нескольких словарей. Каждый словарь читается один раз
+    (словари читаются параллельно), слово берется из первого по порядку словаря, в котором оно есть, вместе
+    со всеми определениями из всех его статей в этом словаре. Одинаковые определения слова добавляются один раз
+    :param alchemy: подключение к базе
+    :param absent_words: слова, которых нет в базе
+    :param dict_paths: название словаря - путь до него, в порядке приоритета
+    :param workers: количество процессов для чтения словарей
+    :return: для каждого словаря: статей в словаре, найдено недостающих слов, добавленные слова, количество
+    добавленных и пропущенных повторяющихся определений
+    """
+    absent_words = set(absent_words)
+    tasks = [(path, absent_words) for path in dict_paths.values()]
+    with multiprocessing.Pool(workers or min(len(tasks), os.cpu_count())) as pool:
+        indexes = pool.map(_index_dictionary_task, tasks)
+
+    coverage = OrderedDict()
+    words, definitions, relations = [], [], []
+    session = alchemy.get_session()
+    word_id = (session.query(func.max(Word.id)).scalar() or 0) + 1
+    definition_id = (session.query(func.max(Definition.id)).scalar() or 0) + 1
+    remaining = set(absent_words)
+    for name, (index, entries) in zip(dict_paths, indexes):
+        stats = {'entries': entries, 'found': len(index), 'added': [], 'definitions': 0, 'duplicates': 0}
+        for word_entry in sorted(remaining & index.keys()):
+            pos, glosses = index[word_entry]
+            unique = list(dict.fromkeys(glosses))
+            words.append({'id': word_id, 'word': word_entry, 'pos': pos})
+            for gloss in unique:
+                definitions.append({'id': definition_id, 'definition': gloss})
+                relations.append({'word_id': word_id, 'definition_id': definition_id})
+                definition_id += 1
+            word_id += 1
+            stats['added'].append(word_entry)
+            stats['definitions'] += len(unique)
+            stats['duplicates'] += len(glosses) - len(unique)
+        remaining -= index.keys()
+        coverage[name] = stats
+
+    for table, rows in ((Word.__table__, words), (Definition.__table__, definitions),
+                        (WordDefinitionRelation.__table__, relations)):
+        if rows:
+            session.execute(table.insert(), rows)
     session.commit()
-    return list(added_word_id.keys())
-
-
-def add_absent_words_from_all_dictionaries():
-    dicts = ['ru.wikt', 'mas', 'ushakov', 'bts', 'ruTes', 'ozhshv', 'babenko', 'yarn', 'efremova']
-    dict_paths = {d: 'dicts/{}_final.json'.format(d) for d in dicts[1:]}
-    dict_absent = {d: '{}_absent.json'.format(d) for d in dicts}
-    for i, d in enumerate(dicts[1:]):
-        with open(dict_absent[dicts[i]]) as f:
-            absent_words = json.load(f)
-        print('----------------------------------')
-        print('Missing {} words'.format(len(absent_words)))
-        print('Adding {}'.format(dict_paths[d]))
-        added = add_absent_words_from_dictionary(absent_words, dict_paths[d])
-        print('{} words added'.format(len(added)))
-        new_absent = set(absent_words) - set(added)
-        with open(dict_absent[dicts[i+1]], 'w') as f:
-            json.dump(list(new_absent), f)
-        print('Now missing {} words'.format(len(new_absent)))
+
+    print('----------------------------------')
+    print('Missing {} words'.format(len(absent_words)))
+    for name, stats in coverage.items():
+        print('{}: {} entries, {} missing words found, {} words and {} definitions added, '
+              '{} duplicate definitions skipped'.format(name, stats['entries'], stats['found'], len(stats['added']),
+                                                        stats['definitions'], stats['duplicates']))
+    print('Now missing {} words'.format(len(remaining)))
+    return coverage
+
+
+def add_absent_words_from_dictionary(absent_words: List[str], dict_path: str):
+    """
+    Добавляет слова из absent_words в базу
+    :param absent_words: список недостающих слов
+    :param dict_path: путь до словаря
+    :return: добавленные слова
+    """
+    coverage = merge_dictionaries(load_alchemy('data.db'), absent_words, OrderedDict([(dict_path, dict_path)]),
+                                  workers=1)
+    return coverage[dict_path]['added']
+
+
+def add_absent_words_from_all_dictionaries(absent_words: Optional[Iterable[str]] = None):
+    """
+    добавляет слова синсетов, которых нет в базе, из всех словарей DICTIONARIES (в порядке приоритета),
+    после чего связывает слова синсетов с добавленными словами
+    :param absent_words: недостающие слова, по умолчанию - слова синсетов, которых нет в таблице word
+    """
+    alchemy = load_alchemy('data.db')
+    if absent_words is None:
+        absent_words = find_absent_synset_words(alchemy)
+    coverage = merge_dictionaries(alchemy, absent_words,
+                                  OrderedDict((d, 'dicts/{}_final.json'.format(d)) for d in DICTIONARIES))
+    run_repair(alchemy.get_session().get_bind(), REPAIRS['relink_word_ids'])
+    return coverage
 
 
 def test_all_available_dictionaries(absent_words):
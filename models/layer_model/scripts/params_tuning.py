@@ -1,9 +1,9 @@
 import json
-import tqdm
 
 import numpy as np
 
 from db.base import Word
+from evaluation.sweep import SweepItem, gather_layer_items, sweep_layer_model
 from models.layer_model.model import LayerModel
 from models.layer_model.additional import Word2VecOrdering
 from db.data.manager import get_golden, load_alchemy
@@ -14,11 +14,10 @@ def jaccard_similarity(correct: set, model_prediction: set):
 
 
 def process_tuning(correct_synset: set, model: LayerModel, thresholds: np.array, report: dict, definitions) -> float:
+    scores = sweep_layer_model(model, [SweepItem(correct_synset, list(definitions), definitions)], thresholds,
+                               synsets_filter=lambda x: x.definitions)
     for threshold in thresholds:
-        model.set_fasttext_threshold(threshold)
-        new_synsets = [set(x.words) for x in model.extract_new_synsets(definitions) if x.definitions]
-        scores = [jaccard_similarity(correct_synset, generated_synset) for generated_synset in new_synsets]
-        report[threshold]['scores'].append(max(scores))
+        report[threshold]['scores'].extend(scores[threshold])
 
 
 if __name__ == '__main__':
@@ -35,12 +34,13 @@ if __name__ == '__main__':
     golden = get_golden('golden.txt', drop_bad_synsets=True, drop_unsure_words=True)
     clean_synsets_with_origin_ids = [(key, value) for key, value in golden.items() if value]
 
-    for clean_synset, origin_ids in tqdm.tqdm(clean_synsets_with_origin_ids):
-        concatenated_words = alchemy.get_concatenated_synsets_by_yarn_ids(origin_ids)
-        ordered_words = Word2VecOrdering.order_words_sequence_using_average_sim(list(concatenated_words))
-        definitions = alchemy.get_words_definitions(ordered_words)
-        process_tuning(clean_synset, model, thresholds, report, definitions)
-        print('FINISH {}'.format(clean_synset))
+    # слова, их порядок и определения собираются один раз, схожести - один раз на синсет для всех порогов
+    items = gather_layer_items(alchemy, [clean_synset for clean_synset, _ in clean_synsets_with_origin_ids],
+                               [alchemy.get_concatenated_synsets_by_yarn_ids(origin_ids)
+                                for _, origin_ids in clean_synsets_with_origin_ids])
+    scores = sweep_layer_model(model, items, thresholds, synsets_filter=lambda x: x.definitions)
+    for threshold in thresholds:
+        report[threshold]['scores'] = scores[threshold]
 
     for threshold in thresholds:
         report[threshold]['mean_score'] = np.mean(report[threshold]['scores'])
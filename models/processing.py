@@ -1,15 +1,23 @@
+import sys
+from functools import lru_cache
 from string import punctuation
-from typing import List, Callable, Optional
+from typing import List, Callable, Optional, Tuple, Iterable, Sequence, Dict
 
 from pymorphy2.tokenizers import simple_word_tokenize
 from pymorphy2 import analyzer
 
 from db.data.manager import load_text_file
 
+LEMMA_CACHE_SIZE = 200000
+DEFINITION_CACHE_SIZE = 50000
+
 morph = analyzer.MorphAnalyzer()
 
 stopwords = set(load_text_file('stopwords.txt').split())
 
+# нормализованные заранее определения (см. db/precompute.py), для них pymorphy не вызывается
+_precomputed_normalizations = {}
+
 
 def tokenize(definition: str) -> List[str]:
     """
@@ -20,13 +28,36 @@ def tokenize(definition: str) -> List[str]:
     return [x for x in simple_word_tokenize(definition) if x not in punctuation]
 
 
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(token: str) -> str:
+    """
+    :param token: слово
+    :return: нормальная форма слова по pymorphy, результат кэшируется
+    """
+    return morph.parse(token)[0].normal_form
+
+
+@lru_cache(maxsize=DEFINITION_CACHE_SIZE)
+def _normalized_tokens(definition: str) -> Tuple[str, ...]:
+    precomputed = _precomputed_normalizations.get(definition)
+    if precomputed is not None:
+        return precomputed
+    return tuple(lemmatize(x) for x in tokenize(definition))
+
+
+@lru_cache(maxsize=DEFINITION_CACHE_SIZE)
+def _tokens_without_stop_words(definition: str, normalize: Optional[Callable[[str], List[str]]]) -> Tuple[str, ...]:
+    tokens = normalize(definition) if normalize else tokenize(definition)
+    return tuple(x for x in tokens if x not in stopwords)
+
+
 def simple_normalization_tokens(definition: str) -> List[str]:
     """
     разбивает на токены входное предложение, нормализует их и возвращает лист слов в инфинитиве
     :definition: строка - определение
     :return:
     """
-    return [morph.parse(x)[0].normal_form for x in tokenize(definition)]
+    return list(_normalized_tokens(definition))
 
 
 def remove_stop_words_tokens(definition: str,
@@ -37,6 +68,35 @@ def remove_stop_words_tokens(definition: str,
     :param normalize: функция для предварительной нормализации слов
     :return: отфильтрованный список слов
     """
-    tokens = normalize(definition) if normalize else tokenize(definition)
-    return [x for x in tokens if x not in stopwords]
+    return list(_tokens_without_stop_words(definition, normalize))
+
+
+def register_normalized_definitions(normalizations: Iterable[Tuple[str, Sequence[str]]]) -> int:
+    """
+    запоминает нормализованные заранее определения, после этого simple_normalization_tokens не обращается
+    к pymorphy для этих определений
+    :param normalizations: пары определение - его нормализованные токены
+    :return: сколько определений запомнено
+    """
+    count = 0
+    for definition, tokens in normalizations:
+        _precomputed_normalizations[definition] = tuple(sys.intern(t) for t in tokens)
+        count += 1
+    return count
+
+
+def processing_cache_info() -> Dict[str, object]:
+    """
+    :return: статистика попаданий и промахов кэшей обработки (CacheInfo из functools) и
+    количество заранее нормализованных определений
+    """
+    return {'lemmas': lemmatize.cache_info(),
+            'definitions': _normalized_tokens.cache_info(),
+            'stop_words': _tokens_without_stop_words.cache_info(),
+            'precomputed': len(_precomputed_normalizations)}
+
 
+def clear_processing_caches():
+    lemmatize.cache_clear()
+    _normalized_tokens.cache_clear()
+    _tokens_without_stop_words.cache_clear()
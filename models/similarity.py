@@ -0,0 +1,135 @@
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from models.layer_model.base import Definition
+from models.metrics import general_metric, jacard_metric, jacard_with_word_influence
+from models.processing import simple_normalization_tokens, tokenize
+
+
+def incidence_matrix(token_sets: Sequence[Sequence[str]], vocabulary: Dict[str, int]) -> sparse.csr_matrix:
+    """
+    :param token_sets: наборы токенов (например, обработанные определения)
+    :param vocabulary: словарь токен - номер столбца, дополняется новыми токенами
+    :return: разреженная бинарная матрица, где [i, j] = 1, если j-й токен есть в i-м наборе
+    """
+    indptr, indices = [0], []
+    for tokens in token_sets:
+        indices.extend(sorted(set(vocabulary.setdefault(t, len(vocabulary)) for t in tokens)))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(token_sets), max(len(vocabulary), 1)))
+
+
+def jaccard_matrix(incidence: sparse.csr_matrix) -> np.ndarray:
+    """
+    :param incidence: бинарная матрица вхождения токенов в наборы
+    :return: матрица, где [i, j] - коэффициент жаккара i-го и j-го наборов. Для двух пустых наборов - 0
+    """
+    intersection = (incidence @ incidence.T).toarray()
+    sizes = np.diag(intersection)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros(intersection.shape), where=union > 0)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    :param vectors: матрица, строки - векторы
+    :return: матрица из векторов единичной длины (нулевые векторы остаются нулевыми)
+    """
+    vectors = np.asarray(vectors)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros(vectors.shape, dtype=vectors.dtype), where=norms > 0)
+
+
+def cosine_matrix(vectors: np.ndarray, other: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    :param vectors: матрица, строки - векторы
+    :param other: вторая матрица векторов, если не задана - сравнение vectors сами с собой
+    :return: матрица косинусных мер, [i, j] - косинусная мера i-го вектора из vectors и j-го из other
+    """
+    normalized = normalize_rows(vectors)
+    return normalized @ (normalized if other is None else normalize_rows(other)).T
+
+
+class DefinitionSimilarity:
+    """
+    Вычисляет схожесть слов синсета по их определениям сразу для всех пар через матричные операции.
+    Результат совпадает с Model.strict_similarity для метрик general_metric + jacard_metric/jacard_with_word_influence
+    """
+
+    def __init__(self, processing: Callable[[str], List[str]] = simple_normalization_tokens,
+                 word_influence: bool = False):
+        """
+        :param processing: обработка строки определения в список токенов
+        :param word_influence: учитывать ли вхождение одного слова в определение другого (jacard_with_word_influence)
+        """
+        self.__processing = processing
+        self.__word_influence = word_influence
+
+    @staticmethod
+    def from_metric(metric) -> Optional['DefinitionSimilarity']:
+        """
+        :param metric: метрика модели
+        :return: векторизованная версия метрики, если метрика - general_metric с жаккаром, иначе None
+        """
+        if not isinstance(metric, partial) or metric.func is not general_metric or metric.args:
+            return None
+        sim_metric = metric.keywords.get('sim_metric', jacard_metric)
+        if sim_metric not in (jacard_metric, jacard_with_word_influence):
+            return None
+        processing = metric.keywords.get('processing', simple_normalization_tokens) or tokenize
+        return DefinitionSimilarity(processing, word_influence=sim_metric is jacard_with_word_influence)
+
+    def definitions_matrix(self, words: List[str], definitions: List[Union[str, Definition]]) -> np.ndarray:
+        """
+        :param words: слово для каждого определения
+        :param definitions: определения
+        :return: матрица, где [i, j] - схожесть i-го определения на j-е
+        """
+        processed = {}
+        token_sets = []
+        for d in definitions:
+            text = d.definition if isinstance(d, Definition) else d
+            if text not in processed:
+                processed[text] = self.__processing(text)
+            token_sets.append(processed[text])
+
+        vocabulary = {}
+        incidence = incidence_matrix(token_sets, vocabulary)
+        matrix = jaccard_matrix(incidence)
+        if self.__word_influence:
+            columns = np.array([vocabulary.get(w, -1) for w in words])
+            known = columns >= 0
+            # contains[i, j] - входит ли слово j-го определения в i-е определение
+            contains = np.zeros(matrix.shape, dtype=bool)
+            contains[:, known] = incidence[:, columns[known]].toarray() > 0
+            matrix[contains | contains.T] = 1
+        return matrix
+
+    def words_matrix(self, pairs: List[Tuple[str, List[Union[str, Definition]]]]) -> np.ndarray:
+        """
+        :param pairs: лист из кортежей вида: слово - лист определений
+        :return: матрица, где [i, j] - самая большая схожесть между определениями i-го и j-го слов, [i, i] = 0
+        """
+        if not pairs:
+            return np.zeros((0, 0))
+        words = [w for w, ds in pairs for _ in ds]
+        definitions = [d for _, ds in pairs for d in ds]
+        starts = np.cumsum([0] + [len(ds) for _, ds in pairs[:-1]])
+        matrix = self.definitions_matrix(words, definitions)
+        matrix = np.maximum.reduceat(np.maximum.reduceat(matrix, starts, axis=0), starts, axis=1)
+        np.fill_diagonal(matrix, 0)
+        return matrix
+
+    def strict_similarity(self, first: Tuple[str, List[Union[str, Definition]]],
+                          second: Tuple[str, List[Union[str, Definition]]]) -> float:
+        """
+        :return: самая большая схожесть между определениями first и second
+        """
+        w1, ds1 = first
+        w2, ds2 = second
+        matrix = self.definitions_matrix([w1] * len(ds1) + [w2] * len(ds2), list(ds1) + list(ds2))
+        return float(matrix[:len(ds1), len(ds1):].max())
@@ -1,12 +1,64 @@
 import math
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 
 import numpy as np
 from gensim.models import FastText
 from sklearn.metrics.pairwise import cosine_similarity
 
 from db.data.manager import load_fasttext_bin
+from models.definition_vectors import DefinitionVectors
 from models.layer_model.base import Definition
+from models.similarity import cosine_matrix
+
+
+class PrecomputedSimilarities:
+    """
+    Попарные косинусные меры между определениями (по Definition.id) и между словами одного синсета, посчитанные
+    один раз. Нужны, когда один и тот же синсет обрабатывается много раз с разными порогами
+    """
+
+    def __init__(self, model, definitions: Iterable[Definition], words: Iterable[str]):
+        """
+        :param model: модель, которая по строке возвращает вектор (интерфейс gensim)
+        :param definitions: определения синсета
+        :param words: слова синсета
+        """
+        self.__definition_rows, self.__definitions = self.__build(
+            model, {d.id: d.definition for d in definitions if d.id is not None})
+        self.__word_rows, self.__words = self.__build(model, {w: w for w in words})
+
+    @staticmethod
+    def __build(model, texts: Dict):
+        """
+        :param texts: ключ - строка модели
+        :return: номера строк матрицы для ключей, векторы для которых построены, и матрица косинусных мер
+        """
+        rows, vectors = {}, []
+        for key, text in texts.items():
+            try:
+                vectors.append(model[text])
+            except KeyError:
+                continue
+            rows[key] = len(vectors) - 1
+        return rows, cosine_matrix(np.array(vectors)) if vectors else np.zeros((0, 0))
+
+    def definitions_similarity(self, target: Definition, comparing: List[Definition]) -> Optional[np.ndarray]:
+        """
+        :return: косинусные меры target с каждым из comparing или None, если какого-то определения нет
+        """
+        rows = [self.__definition_rows.get(d.id) for d in [target] + list(comparing)]
+        if None in rows:
+            return None
+        return self.__definitions[rows[0], rows[1:]]
+
+    def words_similarity(self, word: str, words: List[str]) -> Optional[np.ndarray]:
+        """
+        :return: косинусные меры word с каждым из words или None, если какого-то слова нет
+        """
+        rows = [self.__word_rows.get(w) for w in [word] + list(words)]
+        if None in rows:
+            return None
+        return self.__words[rows[0], rows[1:]]
 
 
 class FastTextWrapper:
@@ -15,17 +67,24 @@ class FastTextWrapper:
     """
     similarity_strategies = ['average', 'closest', 'last']
 
-    def __init__(self, model_path: str=None, cosine_sim_threshold=0.55):
+    def __init__(self, model_path: str=None, cosine_sim_threshold=0.55,
+                 definition_vectors: Optional[DefinitionVectors] = None, pretrained_model=None):
         """
         :param model_path: путь до предъобученной бинарной модели
         :param cosine_sim_threshold: пороговое значение для сравнения. Если схожесть не будет превосходить
         указанного знпчения при сравнении двух определений, то считается, что определения похожи
+        :param definition_vectors: заранее посчитанные векторы определений из базы, если они есть, то векторы
+        определений берутся оттуда по Definition.id, а не строятся моделью заново
+        :param pretrained_model: уже загруженная модель, реализующая интерфейс gensim-а (например, заглушка
+        в бенчмарках), тогда model_path не используется
         """
         self.__threshold = cosine_sim_threshold
-        if not model_path:
-            self.__model = load_fasttext_bin('fasttext_model/araneum_none_fasttextcbow_300_5_2018.model')
+        self.__definition_vectors = definition_vectors
+        self.__precomputed = None
+        if pretrained_model is not None:
+            self.__model = pretrained_model
         else:
-            pass
+            self.__model = load_fasttext_bin(model_path or 'fasttext_model/araneum_none_fasttextcbow_300_5_2018.model')
 
         self.__similarity_strategy = 'average'
         if self.__similarity_strategy not in FastTextWrapper.similarity_strategies:
@@ -36,6 +95,20 @@ class FastTextWrapper:
             raise ValueError('Схожесть должна быть в интервале (0,1)')
         self.__threshold = new_cosine_sim_threshold
 
+    def set_definition_vectors(self, definition_vectors: Optional[DefinitionVectors]):
+        self.__definition_vectors = definition_vectors
+
+    def precompute(self, definitions: Iterable[Definition], words: Iterable[str]) -> PrecomputedSimilarities:
+        """
+        считает попарные схожести определений и слов синсета, после этого сравнения внутри синсета берутся из них
+        (до вызова set_precomputed(None))
+        """
+        self.__precomputed = PrecomputedSimilarities(self.__model, definitions, words)
+        return self.__precomputed
+
+    def set_precomputed(self, precomputed: Optional[PrecomputedSimilarities]):
+        self.__precomputed = precomputed
+
     def set_new_strategy(self, new_strategy: str):
         if new_strategy not in FastTextWrapper.similarity_strategies:
             raise ValueError('Неизвестная стратегия схожести -{}'.format(new_strategy))
@@ -91,6 +164,14 @@ class FastTextWrapper:
 
     def __get_cosine_similarity(self, target_definition: Definition,
                                 comparing_definitions: List[Definition]) -> np.array:
+        if self.__precomputed is not None:
+            precomputed = self.__precomputed.definitions_similarity(target_definition, comparing_definitions)
+            if precomputed is not None:
+                return precomputed
+        if self.__definition_vectors is not None:
+            stored = self.__get_stored_cosine_similarity(target_definition, comparing_definitions)
+            if stored is not None:
+                return stored
         try:
             target_definition_vector = np.array([self.__model[target_definition.definition]])
         except KeyError:
@@ -105,10 +186,28 @@ class FastTextWrapper:
             raise KeyError('Все слова неизвестны')
         return cosine_similarity(target_definition_vector, comparing_definitions_vectors)[0]
 
+    def __get_stored_cosine_similarity(self, target_definition: Definition,
+                                       comparing_definitions: List[Definition]) -> Optional[np.array]:
+        """
+        :return: косинусные меры по заранее посчитанным нормированным векторам или None, если каких-то
+        определений нет в хранилище (тогда векторы строятся моделью)
+        """
+        ids = [target_definition.id] + [x.id for x in comparing_definitions]
+        if not all(def_id in self.__definition_vectors for def_id in ids):
+            return None
+        vectors = self.__definition_vectors.vectors(ids)
+        if not vectors.any(axis=1).all():
+            return None
+        return vectors[1:] @ vectors[0]
+
     def is_word_similar_to_list(self, word: str, word_list: List[str]) -> bool:
         """
         Определяет, похоже ли слово на список других слов (да - если усредненная косинусная мера превосходит порог)
         """
+        if self.__precomputed is not None:
+            precomputed = self.__precomputed.words_similarity(word, word_list)
+            if precomputed is not None:
+                return np.mean(precomputed) > self.__threshold
         target_vector = np.array([self.__model[word]])
         comparing_word_vectors = np.array([self.__model[w] for w in word_list])
         average_similarity = np.mean(cosine_similarity(target_vector, comparing_word_vectors))
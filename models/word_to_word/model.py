@@ -1,5 +1,5 @@
 from itertools import combinations
-from typing import List
+from typing import Dict, List, Optional
 
 import numpy as np
 
@@ -29,33 +29,64 @@ class WordToWord:
             raise ValueError('Схожесть должна быть в интервале (0,1)')
         self.__threshold = new_threshold
 
-    def __is_similar(self, target_word, other_words: List[str]) -> bool:
-        target_word_vector = np.array([self.__model[target_word]])
-        other_words_vectors = np.array([self.__model[word] for word in other_words])
-
-        similarities = cosine_similarity(target_word_vector, other_words_vectors)[0]
-        return np.mean(similarities) >= self.__threshold
+    def word_similarity_matrix(self, words: List[str]) -> np.ndarray:
+        """
+        :param words: слова
+        :return: матрица косинусных мер, [i, j] - схожесть i-го и j-го слова
+        """
+        return cosine_similarity(np.array([self.__model[word] for word in words]))
 
-    def extract_clusters(self, source_words: List[str]) -> List[List[str]]:
+    def extract_clusters(self, source_words: List[str], similarity: Optional[np.ndarray] = None) -> List[List[str]]:
         """
+        пара слов образует начальную группу, если их схожесть не меньше порога; группа пополняется словами, средняя
+        схожесть которых со словами группы не меньше порога. Все схожести берутся из одной матрицы, посчитанной
+        для входа один раз, а средняя схожесть кандидатов с группой обновляется при добавлении каждого слова.
+        Одинаковые (по набору слов) кластеры, выросшие из разных пар, возвращаются один раз - на месте первого
         :param source_words: исходный набор уникальных слов
+        :param similarity: заранее посчитанная word_similarity_matrix(list(source_words)), например, чтобы
+        применить модель к одним и тем же словам с разными порогами
         :return: возвращает список кластеров. кластер - такое подмножесто слов, что у них общий смсысл
         """
-        pairs = [list(tuple_) for tuple_ in combinations(source_words, 2)]
-
-        word_groups = [pair for pair in pairs if self.__is_similar(pair[0], [pair[1]])]
-
-        if not word_groups:
+        words = list(source_words)
+        if similarity is None:
+            similarity = self.word_similarity_matrix(words)
+        similarity = np.asarray(similarity, dtype=np.float64)
+        index = {word: i for i, word in enumerate(words)}
+
+        # пары в порядке combinations(source_words, 2)
+        first, second = np.triu_indices(len(words), 1)
+        similar = similarity[first, second] >= self.__threshold
+        if not similar.any():
             return [source_words]
 
-        return [self.__gain_cluster(group, source_words) for group in word_groups]
-
-    def __gain_cluster(self, group: List[str], source_words: List[str]) -> List[str]:
+        clusters = []
+        seen = set()
+        for i, j in zip(first[similar], second[similar]):
+            cluster = self.__gain_cluster([words[i], words[j]], source_words, words, similarity, index)
+            key = frozenset(cluster)
+            if key not in seen:
+                seen.add(key)
+                clusters.append(cluster)
+        return clusters
+
+    def __gain_cluster(self, group: List[str], source_words: List[str], words: List[str], similarity: np.ndarray,
+                       index: Dict[str, int]) -> List[str]:
+        # кандидаты рассматриваются в порядке not_yet_included.pop(), каждый - один раз
         not_yet_included = list(set(source_words) - set(group))
-        while not_yet_included:
-            peek = not_yet_included.pop()
-            if self.__is_similar(peek, group):
-                group.append(peek)
+        candidates = np.array([index[word] for word in reversed(not_yet_included)], dtype=np.int64)
+        # суммарная схожесть каждого слова со словами группы
+        totals = similarity[[index[word] for word in group]].sum(axis=0)
+        position = 0
+        while position < len(candidates):
+            accepted = np.flatnonzero(totals[candidates[position:]] / len(group) >= self.__threshold)
+            if not accepted.size:
+                break
+            # все кандидаты до первого принятого сравнивались с той же группой и отброшены
+            position += accepted[0]
+            peek = candidates[position]
+            group.append(words[peek])
+            totals += similarity[peek]
+            position += 1
         return group
 
 
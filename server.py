@@ -1,17 +1,77 @@
+import atexit
+import hashlib
 import json
+import os
+import sys
+import threading
+import time
 
 import bottle
 from beaker.middleware import SessionMiddleware
-from bottle import route, request, error, template, static_file
+from bottle import route, request, response, error, template, static_file, hook
 from cork import Cork, AuthException
 
 from db.alchemy import Alchemy
+from db.definitions_cache import WordDefinitionsCache
+from db.editions import EditionWriter
+from db.precompute import load_normalized_definitions
+from db.results_cache import CleanedSynsetsCache
 from models.launcher import create_majority_row_model
+from models.processing import lemmatize, processing_cache_info
 from models.utils import results_as_dict
 
-alchemy = Alchemy(path='db/data.db')
+DB_PATH = 'db/data.db'
+# True - ответ на правку отправляется только после того, как она записана на диск
+DURABLE_EDITIONS = False
+
+alchemy = Alchemy(path=DB_PATH, scoped=True)
+# правки пишутся в базу отдельным потоком пачками, см. db/editions.py
+edition_writer = EditionWriter(DB_PATH, durable=DURABLE_EDITIONS)
+atexit.register(edition_writer.close)
+# определения слов для всплывающего окна на странице, у каждого процесса свой кэш
+definitions_cache = WordDefinitionsCache(alchemy)
+# определения меняются только при перезагрузке словаря, поэтому браузер может их хранить
+DEFINITIONS_MAX_AGE = 3600
 app = bottle.app()
-active_model = create_majority_row_model()
+active_model = None
+# ответы модели для синсетов, заполняется заранее: python -m db.results_cache
+results_cache = None
+# состояние прогрева: пока ready = False, запросы к модели получают 503
+warm_up_state = {'ready': False, 'seconds': None}
+
+
+def warm_up():
+    """
+    загружает все, что нужно модели (сама модель, стоп-слова и pymorphy при импорте models.processing,
+    нормализованные определения из базы). При запуске нескольких процессов вызывается один раз до fork,
+    после чего процессы делят загруженные данные (copy-on-write)
+    """
+    global active_model, results_cache
+
+    start = time.perf_counter()
+    active_model = create_majority_row_model()
+    results_cache = CleanedSynsetsCache(alchemy, active_model)
+    load_normalized_definitions(alchemy)
+    # первый разбор pymorphy подгружает словари анализатора
+    lemmatize('прогрев')
+    # соединения с базой не должны переходить в дочерние процессы
+    alchemy.dispose()
+    warm_up_state['seconds'] = time.perf_counter() - start
+    warm_up_state['ready'] = True
+
+
+@hook('after_request')
+def close_session():
+    alchemy.remove_session()
+
+
+@route('/ready')
+def ready():
+    response.content_type = 'application/json'
+    if not warm_up_state['ready']:
+        response.status = 503
+    return json.dumps({'ready': warm_up_state['ready'], 'warm_up_seconds': warm_up_state['seconds'],
+                       'pid': os.getpid(), 'precomputed_definitions': processing_cache_info()['precomputed']})
 
 
 @route('/')
@@ -24,8 +84,9 @@ def login():
 def contribute():
     # TODO проверка авторизации
     # TODO добавить логику выдачи синсетов
-    yarn_ids, synset_definitions = alchemy.get_synsets_definitions((45, 55))
-    answers = active_model.clean(synset_definitions)
+    if not warm_up_state['ready']:
+        bottle.abort(503, 'Модель еще загружается')
+    yarn_ids, answers = results_cache.get_range((45, 55))
     result = results_as_dict(yarn_ids, answers)
     return template('static/html/synsets.html', synsets=result)
 
@@ -35,18 +96,62 @@ def receive_edition():
     # TODO добавить проверку авторизации
     response = request.json
     syn_id, correct, wrong = int(response.get('id').replace('syn-', '')), response.get('correct'), response.get('wrong')
-    # TODO хранение изменений в базе
-    # TODO отправлять ответ об ошибке
-    print(syn_id, correct, wrong)
+    try:
+        # страница присылает слова через ';' (см. static/js/handlingchanges.js), так они и записываются
+        edition_writer.submit(syn_id, correct or '')
+    except Exception as e:
+        print('Правка синсета {} не записана: {}'.format(syn_id, e))
+        return json.dumps({'status': 'error'})
     return json.dumps({'status': 'ok'})
 
 
+@route('/edition_metrics')
+def edition_metrics():
+    return json.dumps(edition_writer.metrics())
+
+
 @route('/word_definition', method='POST')
 def word_definition():
     # TODO проверка авторизации
     word = request.json.get('word')
-    definitions = alchemy.get_word_definitions(word)
-    return json.dumps(definitions)
+    return json.dumps(definitions_cache.get([word])[word], ensure_ascii=False)
+
+
+@route('/word_definitions', method=['GET', 'POST'])
+def word_definitions():
+    """
+    определения сразу для нескольких слов: GET ?words=слово1;слово2 или ?synset_id=yarn_id,
+    либо POST {"words": [...]} или {"synset_id": yarn_id}. Ответ - {слово: [определения]}
+    """
+    # TODO проверка авторизации
+    params = request.json if request.method == 'POST' else request.query.decode()
+    if request.method == 'POST' and not isinstance(params, dict):
+        bottle.abort(400, 'Ожидается JSON-объект с полем words или synset_id')
+    if params.get('synset_id') is not None:
+        try:
+            synset_id = int(str(params.get('synset_id')).replace('syn-', ''))
+        except ValueError:
+            bottle.abort(400, 'synset_id должен быть числом')
+        words = alchemy.get_synset_words(synset_id)
+    else:
+        words = params.get('words') or []
+        if isinstance(words, str):
+            words = [w for w in words.split(';') if w]
+        if not isinstance(words, list) or not all(isinstance(w, str) for w in words):
+            bottle.abort(400, 'words должен быть списком слов или строкой слов через ";"')
+    body = json.dumps(definitions_cache.get(words), ensure_ascii=False)
+    response.content_type = 'application/json; charset=utf-8'
+    if request.method != 'GET':
+        # ответы на POST не кэшируются
+        return body
+
+    etag = '"{}"'.format(hashlib.sha1(body.encode('utf-8')).hexdigest())
+    response.set_header('ETag', etag)
+    response.set_header('Cache-Control', 'private, max-age={}'.format(DEFINITIONS_MAX_AGE))
+    if etag in request.get_header('If-None-Match', ''):
+        response.status = 304
+        return ''
+    return body
 
 
 @route('/<filename:path>')
@@ -54,6 +159,21 @@ def send_file(filename):
     return static_file(filename, root='static/')
 
 
+def serve(host: str = 'localhost', port: int = 5050, workers: int = 4):
+    """
+    запускает сервер в нескольких процессах gunicorn (pip install -r requirements.txt). Прогрев выполняется
+    в главном процессе до fork (preload_app), поэтому каждый процесс сразу готов отвечать
+    """
+    warm_up()
+    bottle.run(app=app, server='gunicorn', host=host, port=port, workers=workers, preload_app=True)
+
+
 if __name__ == '__main__':
-    bottle.debug(True)
-    bottle.run(app=app, host='localhost', port=5050)
+    # python server.py - однопроцессный сервер для разработки, модель загружается в фоне (см. /ready)
+    # python server.py 4 - 4 процесса gunicorn (gunicorn указан в requirements.txt)
+    if len(sys.argv) > 1:
+        serve(workers=int(sys.argv[1]))
+    else:
+        threading.Thread(target=warm_up, daemon=True).start()
+        bottle.debug(True)
+        bottle.run(app=app, host='localhost', port=5050)
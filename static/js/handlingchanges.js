@@ -17,4 +17,39 @@ function BagOfElements() {
 	}
 }
 
-var bag = new BagOfElements();
\ No newline at end of file
+var bag = new BagOfElements();
+
+function DefinitionsLoader() {
+	// определения загружаются сразу для всех слов синсета одним запросом и запоминаются
+	var definitions = {};
+	var requests = {};
+
+	this.load = function(word, synsetElement, callback) {
+		if (definitions.hasOwnProperty(word)) {
+			callback(definitions[word]);
+			return;
+		}
+		var id = synsetElement.id;
+		if (!requests.hasOwnProperty(id)) {
+			var words = [];
+			var children = synsetElement.getElementsByTagName('li');
+			for (var i=0; i < children.length; i++)
+				words.push(children[i].textContent);
+			requests[id] = $.ajax({
+				type: 'GET',
+				url: 'word_definitions',
+				dataType: 'json',
+				data: {'words' : words.join(';')}
+			}).done(function(response) {
+				$.extend(definitions, response);
+			}).fail(function() {
+				delete requests[id];
+			});
+		}
+		requests[id].done(function() {
+			callback(definitions[word] || []);
+		});
+	}
+}
+
+var definitionsLoader = new DefinitionsLoader();
\ No newline at end of file
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from db.data.manager import get_golden_csv
+from evaluation.clusters import find_most_similar_cluster, get_golden_to_clusters_mapping, golden_to_clusters_mapping, \
+    read_clusters
+from models.metrics import jacard_metric
+
+
+def legacy_mapping(yarn_clusters, golden):
+    """
+    сопоставление так, как оно делалось раньше: каждый эталон сравнивается со всеми кластерами
+    """
+    golden_to_cluster = {}
+    for g_id, golden_cluster in golden.items():
+        id_similar_clusters = find_most_similar_cluster(yarn_clusters, golden_cluster,
+                lambda yarn_clst, golden_clst:
+                jacard_metric(None, None, golden_clst['synset_ids'], yarn_clst['synset_ids']))
+        if len(id_similar_clusters) > 1:
+            word_similar_clusters = find_most_similar_cluster({i: yarn_clusters[i] for i in id_similar_clusters},
+                                                              golden_cluster,
+                lambda yarn_clst, golden_clst:
+                jacard_metric(None, None, golden_clst['words'], yarn_clst['words']))
+            if len(word_similar_clusters) > 1:
+                golden_to_cluster[g_id] = random.choice(word_similar_clusters)
+            else:
+                golden_to_cluster[g_id] = word_similar_clusters[0]
+        else:
+            golden_to_cluster[g_id] = id_similar_clusters[0]
+    return golden_to_cluster
+
+
+def write_clusters(path, clusters, prefix=''):
+    """
+    записывает кластеры в формате 3to9.csv (и new_golden.csv при prefix='')
+    """
+    with open(path, 'w') as f:
+        for index, cluster in clusters.items():
+            f.write('{};{};{}\n'.format(index, ','.join(prefix + str(s) for s in sorted(cluster['synset_ids'])),
+                                        ','.join(sorted(cluster['words']))))
+
+
+def random_clusters(rng: random.Random, count: int, synsets: int, words: int, key=int):
+    # маленькие словари id и слов, чтобы было много кластеров с одинаковой схожестью
+    return {key(i): {'synset_ids': set(rng.sample(range(synsets), rng.randint(1, 5))),
+                     'words': frozenset('w{}'.format(w) for w in rng.sample(range(words), rng.randint(1, 6)))}
+            for i in range(count)}
+
+
+@pytest.fixture
+def files(tmp_path):
+    rng = random.Random(0)
+    clusters = random_clusters(rng, 80, synsets=150, words=40)
+    golden = random_clusters(rng, 60, synsets=150, words=40, key=lambda i: 'g{}'.format(i))
+    golden['g_without_common'] = {'synset_ids': {1000}, 'words': frozenset(['нет'])}
+    golden['g_without_common_ids'] = {'synset_ids': {1001}, 'words': frozenset(['w1', 'w2'])}
+    clusters_path, golden_path = str(tmp_path / 'clusters.csv'), str(tmp_path / 'golden.csv')
+    write_clusters(clusters_path, clusters, prefix='s')
+    write_clusters(golden_path, golden)
+    return clusters_path, golden_path
+
+
+def test_find_most_similar_cluster_with_candidates():
+    clusters = random_clusters(random.Random(1), 30, synsets=40, words=10)
+    similarity = lambda yarn_clst, golden_clst: jacard_metric(None, None, golden_clst['synset_ids'],
+                                                              yarn_clst['synset_ids'])
+    for golden_cluster in random_clusters(random.Random(2), 30, synsets=40, words=10).values():
+        candidates = [i for i in clusters if clusters[i]['synset_ids'] & golden_cluster['synset_ids']]
+        assert find_most_similar_cluster(clusters, golden_cluster, similarity, candidates) == \
+            find_most_similar_cluster(clusters, golden_cluster, similarity)
+
+
+@pytest.mark.parametrize('vectorized', [True, False])
+def test_mapping_matches_comparison_with_all_clusters(files, vectorized):
+    clusters_path, golden_path = files
+    yarn_clusters, golden = read_clusters(clusters_path), get_golden_csv(golden_path)
+    for seed in range(5):
+        random.seed(seed)
+        expected = legacy_mapping(yarn_clusters, golden)
+        random.seed(seed)
+        assert get_golden_to_clusters_mapping(clusters_path, golden_path, vectorized=vectorized) == expected
+        if vectorized:
+            random.seed(seed)
+            assert golden_to_clusters_mapping(yarn_clusters, golden) == expected
@@ -0,0 +1,61 @@
+import ast
+import os
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from db.data.manager import get_golden_csv
+from evaluation import evaluation_base
+from evaluation.metrics import METRICS, jprf_scores, pairs_scores, read_golden, read_submission, write_submission
+from evaluation.validation_folder import evaluate
+
+SUBMISSIONS = [os.path.join(os.path.dirname(evaluate.__file__), name)
+               for name in ('word2word_submission.csv', 'word2defs_average_submission.csv')]
+
+
+def legacy_evaluate(results):
+    """
+    evaluate так, как он считался раньше: get_JPRF для каждой пары и среднее
+    """
+    return np.array([evaluate.get_JPRF(ideal, version) for ideal, version in results]).mean(axis=0)
+
+
+def random_results(rng: random.Random, count: int = 200):
+    words = ['w{}'.format(i) for i in range(30)]
+    return [(frozenset(rng.sample(words, rng.randint(1, 10))), frozenset(rng.sample(words, rng.randint(1, 10))))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize('module', [evaluate, evaluation_base])
+def test_evaluate_matches_per_pair_loop(module):
+    results = random_results(random.Random(0))
+    # пары без общих слов (F-score = 0) и совпадающие синсеты
+    results += [(frozenset(['a']), frozenset(['b'])), (frozenset(['a', 'b']), frozenset(['b', 'a']))]
+    np.testing.assert_allclose(module.evaluate(results), legacy_evaluate(results), rtol=1e-12)
+    np.testing.assert_array_equal(pairs_scores(results), [evaluate.get_JPRF(i, v) for i, v in results])
+
+
+def test_empty_synset_is_an_error():
+    with pytest.raises(ZeroDivisionError):
+        pairs_scores([(frozenset(['a']), frozenset())])
+
+
+@pytest.mark.parametrize('path', SUBMISSIONS)
+def test_jprf_scores_on_committed_submissions(path, tmp_path):
+    golden = get_golden_csv('new_golden.csv')
+    frame = pd.read_csv(path, encoding='utf-8')
+    expected = [evaluate.get_JPRF(golden[g_id]['words'], set(ast.literal_eval(best)))
+                for g_id, best in zip(frame.golden_id, frame.best)]
+
+    submission = read_submission(path)
+    scores = jprf_scores(read_golden(), submission)
+    assert list(scores.columns) == METRICS
+    assert list(scores.index) == list(pd.unique(frame.golden_id))
+    np.testing.assert_array_equal(scores.values, expected)
+
+    # длинный формат читается так же, как старый
+    converted = str(tmp_path / 'submission.csv')
+    write_submission(converted, {g_id: set(ast.literal_eval(best)) for g_id, best in zip(frame.golden_id, frame.best)})
+    assert jprf_scores(read_golden(), read_submission(converted)).equals(scores)
@@ -0,0 +1,84 @@
+import csv
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from benchmarks.synthetic import write_synthetic_dictionary
+from db.base import Base
+from db.parser import import_dictionary, import_synsets
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine('sqlite:///{}'.format(tmp_path / 'data.db'))
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def dictionary_pairs(path):
+    """
+    :return: пары слово - определение в порядке словаря, как их должен загрузить import_dictionary
+    """
+    with open(path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    return [(e['word'][0], d) for e in entries if 'definition' in e and e['word'] for d in e['definition']]
+
+
+def loaded_pairs(engine):
+    with engine.connect() as connection:
+        return [tuple(row) for row in connection.execute(text(
+            'SELECT word.word, definition.definition FROM "wordDefinitionRelation" AS relation '
+            'JOIN word ON word.id = relation.word_id JOIN definition ON definition.id = relation.definition_id '
+            'ORDER BY relation.id'))]
+
+
+def test_import_dictionary_links_definitions_in_non_empty_database(engine, tmp_path):
+    path = str(tmp_path / 'dictionary.jsonl')
+    write_synthetic_dictionary(path, entries_count=500, definitions_per_entry=(1, 4))
+    with open(path, 'a', encoding='utf-8') as f:
+        # статьи без определений и без слова
+        f.write(json.dumps({'word': ['пусто'], 'POS': 'noun', 'definition': []}) + '\n')
+        f.write(json.dumps({'word': [], 'POS': 'noun', 'definition': ['нет слова']}) + '\n')
+        f.write(json.dumps({'word': ['нет'], 'POS': 'noun'}) + '\n')
+    with engine.begin() as connection:
+        # строки, которые уже есть в базе, и "дыры" в id
+        connection.execute(text("INSERT INTO word (id, word, pos) VALUES (7, 'старое', 'noun')"))
+        connection.execute(text("INSERT INTO definition (id, definition) VALUES (3, 'старое определение')"))
+
+    first = import_dictionary(engine, path, transaction_size=70, batch_size=30)
+    second = import_dictionary(engine, path, transaction_size=1000, batch_size=1000)
+
+    expected = dictionary_pairs(path)
+    assert loaded_pairs(engine) == expected + expected
+    assert first['entries'] == second['entries'] == 501
+    assert first['relations'] == len(expected)
+    with engine.connect() as connection:
+        assert connection.execute(text('SELECT count(*) FROM word')).scalar() == 1 + 2 * 501
+
+
+def test_import_synsets_links_words(engine, tmp_path):
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO word (word, pos) VALUES ('дом', 'noun'), ('труд', 'noun')"))
+        connection.execute(text("INSERT INTO synset (id, synset, yarn_id) VALUES (5, 'старый', 5)"))
+    path = str(tmp_path / 'synsets.csv')
+    rows = [{'id': str(i), 'words': ';'.join(['дом ', ' труд', 'слово{}'.format(i)][:i % 3 + 1]),
+             'grammar': 'n', 'domain': 'general'} for i in range(1, 40)]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['id', 'words', 'grammar', 'domain'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    counts = import_synsets(engine, path, batch_size=7)
+
+    assert counts['synsets'] == len(rows)
+    with engine.connect() as connection:
+        loaded = connection.execute(text(
+            'SELECT synset.yarn_id, "synsetWord".word, word.word FROM "synsetWord" JOIN synset '
+            'ON synset.id = "synsetWord".synset_id LEFT JOIN word ON word.id = "synsetWord".word_id '
+            'ORDER BY "synsetWord".id')).fetchall()
+    expected = [(int(row['id']), w.strip(), w.strip() if w.strip() in ('дом', 'труд') else None)
+                for row in rows for w in row['words'].split(';')]
+    assert [tuple(row) for row in loaded] == expected
+    assert counts['unknown_words'] == sum(w is None for _, _, w in expected)
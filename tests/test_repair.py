@@ -0,0 +1,80 @@
+import random
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from benchmarks.synthetic import create_synthetic_database
+from db.repair import REPAIRS, run_repair
+
+PADDING = [' ', '\t', '\n', '\xa0', '\u2003', '\u3000', '\x1c', '\x85', ' \t']
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """
+    сгенерированная база, где у части слов синсетов пробельные символы по краям, у части нет word_id,
+    а часть ссылается на удаленное слово словаря
+    """
+    path = str(tmp_path / 'synthetic.db')
+    create_synthetic_database(path, words_count=300, definitions_per_word=(1, 2), synsets_count=100,
+                              synset_size=(2, 6))
+    engine = create_engine('sqlite:///{}'.format(path))
+    rng = random.Random(0)
+    with engine.begin() as connection:
+        rows = connection.execute(text('SELECT id, word FROM "synsetWord"')).fetchall()
+        # дубликат слова словаря: исправление должно связывать слово синсета со словом с наименьшим id
+        connection.execute(text("INSERT INTO word (word, pos) SELECT word, pos FROM word WHERE id <= 10"))
+        connection.execute(text('DELETE FROM word WHERE id = 11'))
+        for row_id, word in rows:
+            choice = rng.random()
+            if choice < 0.3:
+                word = rng.choice(PADDING) + word + rng.choice(PADDING + [''])
+                connection.execute(text('UPDATE "synsetWord" SET word = :word, word_id = NULL WHERE id = :id'),
+                                   {'word': word, 'id': row_id})
+            elif choice < 0.4:
+                connection.execute(text('UPDATE "synsetWord" SET word_id = NULL WHERE id = :id'), {'id': row_id})
+    yield engine
+    engine.dispose()
+
+
+def synset_words(engine):
+    with engine.connect() as connection:
+        return connection.execute(text('SELECT id, word, word_id FROM "synsetWord" ORDER BY id')).fetchall()
+
+
+@pytest.mark.parametrize('chunk_size', [7, 50000])
+def test_dry_run_counts_match_applied_counts(engine, chunk_size):
+    for repair in REPAIRS.values():
+        before = synset_words(engine)
+        expected = run_repair(engine, repair, chunk_size, dry_run=True)
+        assert synset_words(engine) == before
+        assert any(expected.values())
+        assert run_repair(engine, repair, chunk_size) == expected
+
+
+def test_repairs_are_idempotent(engine):
+    for repair in REPAIRS.values():
+        run_repair(engine, repair, chunk_size=7)
+    repaired = synset_words(engine)
+    for repair in REPAIRS.values():
+        assert not any(run_repair(engine, repair, chunk_size=7, dry_run=True).values())
+        assert not any(run_repair(engine, repair, chunk_size=7).values())
+    assert synset_words(engine) == repaired
+
+
+def test_words_are_stripped_like_str_strip(engine):
+    with engine.connect() as connection:
+        dictionary = {}
+        for word_id, word in connection.execute(text('SELECT id, word FROM word ORDER BY id')):
+            dictionary.setdefault(word, word_id)
+        existing_ids = {row.id for row in connection.execute(text('SELECT id FROM word'))}
+    before = synset_words(engine)
+    for repair in REPAIRS.values():
+        run_repair(engine, repair)
+    for (_, word, word_id), (_, repaired_word, repaired_word_id) in zip(before, synset_words(engine)):
+        assert repaired_word == word.strip()
+        relinked = word != repaired_word or word_id not in existing_ids
+        if relinked and repaired_word in dictionary:
+            assert repaired_word_id == dictionary[repaired_word]
+        else:
+            assert repaired_word_id == word_id
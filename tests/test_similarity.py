@@ -0,0 +1,76 @@
+import itertools
+import random
+from functools import partial
+
+import numpy as np
+import pytest
+
+from models.base import MajorityRowModel
+from models.metrics import general_metric, jacard_metric, jacard_with_word_influence
+from models.processing import remove_stop_words_tokens, simple_normalization_tokens, tokenize
+from models.similarity import DefinitionSimilarity
+
+VOCABULARY = ['дом', 'работа', 'труд', 'дело', 'занятие', 'человек', 'место', 'жилище', 'строение', 'город',
+              'и', 'в', 'на', 'для', 'который', 'большой', 'новый', 'старый', ',', '.']
+
+METRICS = [
+    partial(general_metric),
+    partial(general_metric, sim_metric=jacard_metric, processing=tokenize),
+    partial(general_metric, sim_metric=jacard_with_word_influence, processing=tokenize),
+    partial(general_metric, sim_metric=jacard_with_word_influence, processing=remove_stop_words_tokens),
+    partial(general_metric, sim_metric=jacard_with_word_influence, processing=simple_normalization_tokens),
+]
+
+
+def random_synset_definitions(rng: random.Random, synsets_count: int = 20):
+    """
+    :return: синсеты в формате Alchemy.get_synsets_definitions: словарь слово - лист определений (или None),
+    в определения попадают и слова самого синсета, чтобы срабатывал jacard_with_word_influence
+    """
+    synsets = []
+    for _ in range(synsets_count):
+        words = rng.sample(VOCABULARY[:10], rng.randint(2, 6))
+        synset = {}
+        for word in words:
+            if rng.random() < 0.1:
+                synset[word] = None
+                continue
+            # хотя бы одно слово не из стоп-слов, иначе жаккар пустых множеств не определен
+            synset[word] = [' '.join([rng.choice(VOCABULARY[:10])] +
+                                     [rng.choice(VOCABULARY) for _ in range(rng.randint(0, 7))])
+                            for _ in range(rng.randint(1, 4))]
+        synsets.append(synset)
+    return synsets
+
+
+def per_pair_matrix(metric, pairs):
+    """
+    матрица схожести слов так, как она считалась до DefinitionSimilarity: метрика для каждой пары определений
+    """
+    matrix = np.zeros((len(pairs), len(pairs)))
+    for (i, (w1, ds1)), (j, (w2, ds2)) in itertools.combinations(enumerate(pairs), 2):
+        matrix[i, j] = matrix[j, i] = max(metric(w1, w2, d1, d2) for d1, d2 in itertools.product(ds1, ds2))
+    return matrix
+
+
+@pytest.mark.parametrize('metric', METRICS)
+def test_words_matrix_matches_per_pair_metric(metric):
+    similarity = DefinitionSimilarity.from_metric(metric)
+    assert similarity is not None
+    for synset in random_synset_definitions(random.Random(0)):
+        pairs = [(w, ds) for w, ds in synset.items() if ds is not None]
+        np.testing.assert_allclose(similarity.words_matrix(pairs), per_pair_matrix(metric, pairs))
+
+
+@pytest.mark.parametrize('metric', METRICS)
+def test_clean_matches_per_pair_model(metric):
+    synsets = random_synset_definitions(random.Random(1), synsets_count=50)
+    model = MajorityRowModel(0.4, metric)
+    per_pair_model = MajorityRowModel(0.4, metric)
+    per_pair_model._similarity = None
+    assert model.clean(synsets) == per_pair_model.clean(synsets)
+
+
+def test_other_metrics_are_not_vectorized():
+    assert DefinitionSimilarity.from_metric(general_metric) is None
+    assert DefinitionSimilarity.from_metric(partial(general_metric, sim_metric=lambda *args: 0)) is None
@@ -0,0 +1,91 @@
+import random
+
+import numpy as np
+import pytest
+
+import apply.structures
+from apply.snapshot import ClustersSnapshot, write_snapshot
+from apply.structures import ClustersHolder
+from benchmarks.synthetic import RandomVectors, random_words
+from models.layer_model.base import Definition
+from models.layer_model.model import NewSynset
+
+
+def random_synsets(count: int, seed: int = 0):
+    """
+    :return: синсеты со случайными словами и определениями, каждый пятый - без определений (проблемный)
+    """
+    rng = random.Random(seed)
+    words = random_words(200, rng)
+    synsets = []
+    for i in range(count):
+        synset_words = rng.sample(words, rng.randint(2, 5))
+        definitions = [] if i % 5 == 4 else [
+            Definition(rng.randint(1, 10 ** 6), w, ' '.join(rng.sample(words, rng.randint(1, 3))))
+            for w in synset_words]
+        synsets.append(NewSynset(synset_words, definitions))
+    return synsets
+
+
+def process_in_batches(holder: ClustersHolder, synsets, batch_size: int = 5):
+    # синсеты одного списка сравниваются только с кластерами, которые были до него
+    for start in range(0, len(synsets), batch_size):
+        holder.process_synsets(synsets[start:start + batch_size])
+
+
+def as_tuples(synsets):
+    return [(list(s.words), [(d.id, d.word, d.definition) for d in s.definitions]) for s in synsets]
+
+
+@pytest.fixture
+def holder_factory(monkeypatch):
+    vectors = RandomVectors(dimension=4)
+    monkeypatch.setattr(apply.structures, 'load_fasttext_bin', lambda path: vectors)
+    return ClustersHolder
+
+
+def test_write_snapshot_round_trip(tmp_path):
+    synsets = random_synsets(30)
+    clusters = [synsets[:3], synsets[3:4], synsets[4:10], [NewSynset(['слово'], None)]]
+    centroids = np.random.default_rng(0).standard_normal((6, 4))
+    problem_synsets = [['первый', 'второй'], ['ёж']]
+    path = str(tmp_path / 'snapshot')
+    write_snapshot(path, clusters, centroids, problem_synsets, 0.45, 17)
+    # повторная запись подменяет старый снимок
+    write_snapshot(path, clusters, centroids, problem_synsets, 0.45, 17)
+
+    snapshot = ClustersSnapshot(path)
+    assert len(snapshot) == len(clusters)
+    assert snapshot.threshold == 0.45
+    assert snapshot.processed_synsets == 17
+    assert list(snapshot.cluster_sizes()) == [len(c) for c in clusters]
+    np.testing.assert_array_equal(snapshot.centroids, centroids[:len(clusters)])
+    assert [as_tuples(c) for c in snapshot.clusters()] == \
+        [as_tuples(NewSynset(s.words, s.definitions or []) for s in c) for c in clusters]
+    assert snapshot.problem_synsets() == problem_synsets
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['snapshot']
+
+
+def test_clusters_holder_resumes_from_snapshot(holder_factory, tmp_path):
+    synsets = random_synsets(60, seed=1)
+    path = str(tmp_path / 'snapshot')
+
+    uninterrupted = holder_factory(threshold=0.5)
+    process_in_batches(uninterrupted, synsets)
+
+    interrupted = holder_factory(threshold=0.5)
+    process_in_batches(interrupted, synsets[:25])
+    interrupted.save_snapshot(path)
+    resumed = holder_factory(threshold=0.1)
+    resumed.load_snapshot(path)
+    assert resumed.processed_synsets == 25
+    assert resumed.save_clusters_to_frame().equals(interrupted.save_clusters_to_frame())
+    process_in_batches(resumed, synsets[resumed.processed_synsets:])
+
+    assert resumed.processed_synsets == uninterrupted.processed_synsets == len(synsets)
+    assert resumed.problem_synsets == uninterrupted.problem_synsets
+    frame = resumed.save_clusters_to_frame()
+    assert frame.equals(uninterrupted.save_clusters_to_frame())
+    assert frame.cluster.value_counts().drop(-1).max() > 1
+    vectors = np.random.default_rng(0).standard_normal((5, 4))
+    np.testing.assert_allclose(resumed.similarities(vectors), uninterrupted.similarities(vectors))
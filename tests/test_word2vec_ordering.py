@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import RandomVectors, random_words
+from models.layer_model.additional import Word2VecOrdering
+
+WORDS = random_words(300, random.Random(0))
+
+
+class PartialVectors(RandomVectors):
+    """
+    RandomVectors, которые "знают" только часть слов, как word2vec
+    """
+
+    def __init__(self, vocabulary, dimension: int = 10, seed: int = 0):
+        super().__init__(dimension, seed)
+        self.vocabulary = set(vocabulary)
+
+    def __contains__(self, text: str) -> bool:
+        return text in self.vocabulary
+
+
+def legacy_ordering(model, words):
+    """
+    упорядочивание так, как оно делалось раньше: model.similarity для каждой пары слов
+    """
+    words = np.array(words)
+    matrix = np.array([[model.similarity(x, y) if x in model and y in model and x != y else 0 for y in words]
+                       for x in words])
+    sorted_indexes = np.flip(np.argsort(matrix.mean(axis=1)), axis=0)
+    return list(words[sorted_indexes])
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = PartialVectors(random.Random(0).sample(WORDS, 200))
+    monkeypatch.setattr(Word2VecOrdering, 'loaded_model', model)
+    return model
+
+
+def random_sequences(count: int = 500, seed: int = 1):
+    rng = random.Random(seed)
+    sequences = []
+    for _ in range(count):
+        sequence = rng.sample(WORDS, rng.randint(1, 12))
+        if rng.random() < 0.3:
+            # повторяющиеся слова
+            sequence += rng.choices(sequence, k=rng.randint(1, 3))
+            rng.shuffle(sequence)
+        sequences.append(sequence)
+    return sequences
+
+
+def test_batch_ordering_matches_per_pair_similarity(model):
+    sequences = random_sequences()
+    # слово, которого нет в модели, одно слово, только незнакомые слова, одно слово несколько раз
+    sequences += [['одно'], [WORDS[0]], ['неизвестное', 'незнакомое'], [WORDS[1]] * 3]
+    assert any(w not in model for sequence in sequences for w in sequence)
+    expected = [legacy_ordering(model, words) for words in sequences]
+    assert Word2VecOrdering.order_words_sequences_using_average_sim(sequences) == expected
+    assert [Word2VecOrdering.order_words_sequence_using_average_sim(words) for words in sequences] == expected
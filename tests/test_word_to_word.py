@@ -0,0 +1,23 @@
+import random
+
+import pytest
+
+from benchmarks.synthetic import RandomVectors, random_words
+from benchmarks.word_to_word_clustering import legacy_extract_clusters, without_duplicates
+from models.word_to_word.model import WordToWord
+
+
+@pytest.mark.parametrize('threshold', [0.3, 0.5, 0.7, 0.95])
+@pytest.mark.parametrize('dimension', [3, 8])
+def test_extract_clusters_matches_per_pair_clustering(threshold, dimension):
+    # в маленькой размерности случайные векторы часто похожи, поэтому кластеры растут из многих пар
+    vectors = RandomVectors(dimension, seed=dimension)
+    model = WordToWord(threshold, vectors)
+    rng = random.Random(0)
+    words = random_words(200, rng)
+    for size in (1, 2, 5, 12, 25):
+        source_words = rng.sample(words, size)
+        expected = without_duplicates(legacy_extract_clusters(vectors, source_words, threshold))
+        assert model.extract_clusters(source_words) == expected
+        similarity = model.word_similarity_matrix(source_words)
+        assert model.extract_clusters(source_words, similarity) == expected
@@ -0,0 +1,8 @@
+"""
+точка входа для wsgi-серверов, например: gunicorn --preload --workers 4 --bind localhost:5050 wsgi:application
+модель загружается при импорте, с --preload - один раз в главном процессе до fork
+"""
+from server import app, warm_up
+
+warm_up()
+application = app